@@ -1,21 +1,41 @@
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, render_template, request, jsonify, send_file, Response, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 import json
 import traceback
-import pandas as pd
-import io
 import time
 import uuid
 from datetime import datetime
-from openpyxl.utils import get_column_letter
 
 # 导入现有的搜索脚本逻辑
-from semantic_scholar_search import run_search as semantic_scholar_run_search, _generate_safe_filename
-from arxiv_multi_search import run_search as arxiv_run_search, auto_git_pull
+from semantic_scholar_search import run_search as semantic_scholar_run_search, iter_search as semantic_scholar_iter_search, _generate_safe_filename
+from arxiv_multi_search import run_searches as arxiv_run_searches, auto_git_pull
+from response_cache import get_response_cache
+from venue_index import get_venue_index
+from jobs import JobManager
+from download_artifacts import get_artifact_store, write_download_zip
+from http_session import get_http_stats
+from paper_index import get_paper_index
+from pdf_store import get_pdf_store
+from paper_merge import merge_search_results
+from paper_record import PaperRecord, json_default
+from report_export import (DEFAULT_EXPORT_FORMAT, available_export_formats, check_export_format,
+                           export_filename, export_mimetype, report_bytes, safe_sheet_name)
+
+class PaperJSONProvider(DefaultJSONProvider):
+    """搜索结果中的论文记录 (PaperRecord) 在序列化时直接转换为字典，不需要事先复制为格式化的字典"""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, PaperRecord):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
+
 
 app = Flask(__name__)
+app.json = PaperJSONProvider(app)
 
-# 一个简单的内存存储，用于临时存放下载文件
-TEMP_DOWNLOAD_FILES = {}
+# 后台搜索和下载任务管理器
+JOB_MANAGER = JobManager()
 
 
 # 在应用启动时加载一次会议定义
@@ -26,11 +46,17 @@ except Exception as e:
     print(f"警告：无法加载会议定义文件 'configs/semantic_scholar_default.json'。错误: {e}")
     VENUE_DEFINITIONS = {}
 
+# 预先构建会议索引，避免第一次搜索时才构建
+get_venue_index(VENUE_DEFINITIONS)
+
+# 启动时清理已过期的下载文件
+get_artifact_store().prune()
+
 # --- 辅助函数 ---
 
-def _create_excel_report(data, lang, downloaded_files=None, is_arxiv=False):
+def _create_report(data, lang, downloaded_files=None, is_arxiv=False, fmt=DEFAULT_EXPORT_FORMAT):
     """
-    通用函数，用于创建包含论文数据的Excel报告。
+    通用函数，用于创建包含论文数据的报告 (默认为 Excel，格式见 report_export.EXPORT_FORMATS)。
     可以根据提供的 downloaded_files 列表添加“已下载”状态列。
     """
     downloaded_files = downloaded_files or []
@@ -40,70 +66,30 @@ def _create_excel_report(data, lang, downloaded_files=None, is_arxiv=False):
             'downloaded': '已下载',
             'venue_name': '会议/期刊', 'year': '年份', 'title': '文章标题',
             'matched_keywords': '匹配的摘要词', 'author': '作者', 'citations': '引用数', 'url': 'URL',
-            'updated': '更新日期', 'published': '发表日期'
+            'updated': '更新日期', 'published': '发表日期', 'group': '分组'
         },
         'en': {
             'downloaded': 'Downloaded',
             'venue_name': 'Conference/Journal', 'year': 'Year', 'title': 'Title',
             'matched_keywords': 'Matched Abstract Keywords', 'author': 'Authors', 'citations': 'Citations', 'url': 'URL',
-            'updated': 'Updated', 'published': 'Published'
+            'updated': 'Updated', 'published': 'Published', 'group': 'Group'
         }
     }
     current_headers = headers.get(lang, headers['zh'])
+    downloaded_files = set(downloaded_files)
 
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        for group_name, papers in data.items():
-            if not papers:
-                continue
+    def download_status(paper):
+        return '✓' if f"{_generate_safe_filename(paper)}.pdf" in downloaded_files else '✗'
 
-            df = pd.DataFrame(papers)
-            
-            # --- 新增：准备“已下载”列 ---
-            df['download_status'] = df.apply(
-                lambda row: '✓' if f"{_generate_safe_filename(row)}.pdf" in downloaded_files else '✗',
-                axis=1
-            )
-
-            # 根据模式（Semantic/Arxiv）构建要输出的 DataFrame
-            if is_arxiv:
-                df_for_excel = pd.DataFrame({
-                    current_headers['downloaded']: df['download_status'],
-                    current_headers['updated']: df['updated'],
-                    current_headers['published']: df['published'],
-                    current_headers['title']: df['title'],
-                    current_headers['matched_keywords']: df['matched_keywords'],
-                    current_headers['author']: df['author'],
-                    current_headers['url']: df['url']
-                })
-            else: # Semantic Scholar
-                df_for_excel = pd.DataFrame({
-                    current_headers['downloaded']: df['download_status'],
-                    current_headers['venue_name']: df['venue_name'],
-                    current_headers['year']: df['year'],
-                    current_headers['title']: df['title'],
-                    current_headers['matched_keywords']: df['matched_keywords'],
-                    current_headers['author']: df['author'],
-                    current_headers['citations']: df['citations'],
-                    current_headers['url']: df['url']
-                })
-            
-            safe_name = "".join(c for c in group_name if c.isalnum() or c in (' ', '_')).rstrip()
-            sheet_name = safe_name[:31]
-
-            df_for_excel.to_excel(writer, sheet_name=sheet_name, index=False)
-
-            worksheet = writer.sheets[sheet_name]
-            for idx, col in enumerate(df_for_excel, 1):
-                series = df_for_excel[col]
-                try:
-                    max_len = max(series.astype(str).map(len).max(), len(str(series.name))) + 4
-                except (ValueError, TypeError):
-                    max_len = len(str(series.name)) + 4
-                worksheet.column_dimensions[get_column_letter(idx)].width = max_len
-    
-    output.seek(0)
-    return output
+    # 根据模式（Semantic/Arxiv）确定要输出的列
+    if is_arxiv:
+        fields = ['updated', 'published', 'title', 'matched_keywords', 'author', 'url']
+    else: # Semantic Scholar
+        fields = ['venue_name', 'year', 'title', 'matched_keywords', 'author', 'citations', 'url']
+    columns = [(current_headers['downloaded'], download_status)] + [(current_headers[field], field) for field in fields]
+
+    sheets = ((safe_sheet_name(group_name), columns, papers) for group_name, papers in data.items() if papers)
+    return report_bytes(sheets, fmt=fmt, group_header=current_headers['group'])
 
 
 @app.route('/')
@@ -161,6 +147,113 @@ def get_venues():
 
     return jsonify(output_list)
 
+@app.route('/api/cache/stats')
+def get_cache_stats():
+    """返回本地 API 响应缓存的命中/未命中统计和占用空间"""
+    return jsonify(get_response_cache().stats())
+
+@app.route('/api/index/stats')
+def get_index_stats():
+    """返回本地论文索引中各数据源的论文数量和搜索范围数量"""
+    return jsonify(get_paper_index().stats())
+
+@app.route('/api/pdfs/stats')
+def get_pdf_store_stats():
+    """返回本地 PDF 存储的占用空间和空间上限"""
+    return jsonify(get_pdf_store().stats())
+
+@app.route('/api/http/stats')
+def get_http_stats_route():
+    """返回论文下载的 HTTP 统计：请求数、失败数、字节数和按主机的延迟"""
+    return jsonify(get_http_stats().snapshot())
+
+def _parse_semantic_request(data):
+    """把前端的 Semantic Scholar 搜索请求转换为 (topic, settings)"""
+    query_keywords_raw = data.get('query_keywords', '').strip()
+    abstract_keywords_raw = data.get('abstract_keywords', '').strip()
+
+    query_keywords = [[kw.strip() for kw in line.split(',')] for line in query_keywords_raw.split('\n') if line.strip()]
+    abstract_keywords = [[kw.strip() for kw in line.split(',')] for line in abstract_keywords_raw.split('\n') if line.strip()]
+    
+    min_year = int(data.get('year')) if data.get('year') else None
+    
+    # 解析新增的参数
+    limit = int(data.get('limit', 100))
+    title_exclude_keywords_raw = data.get('title_exclude_keywords', '').strip()
+    title_exclude_keywords = [line.strip() for line in title_exclude_keywords_raw.split('\n') if line.strip()]
+    bulk_search = data.get('bulk_search', True) # 默认为 True
+    
+    print(f"DEBUG: 从前端接收到的数据: \nquery_keywords: {query_keywords}\nabstract_keywords: {abstract_keywords}\nyear: {min_year}\nvenues: {data.get('venues', [])}\nlimit: {limit}\ntitle_exclude_keywords: {title_exclude_keywords}\nbulk_search: {bulk_search}") # 调试打印
+
+    topic = {
+        "direction": "Web Search",
+        "query_keywords": query_keywords,
+        "abstract_keywords": abstract_keywords,
+        "venues_to_search": data.get('venues', [])
+    }
+    settings = {
+        "min_year": min_year, 
+        "limit_per_topic": limit
+    }
+    # 只有当用户实际提供了排除关键词时，才将其添加到 settings 中以覆盖默认值
+    if title_exclude_keywords:
+        settings['title_exclude_keywords'] = title_exclude_keywords
+
+    # 如果 arXiv 被选为 venue，则添加最低引用数
+    if 'arXiv' in data.get('venues', []):
+        min_citations = data.get('min_arxiv_citations')
+        # 显式填写 0 表示不限制；留空时使用配置文件中的 default_min_arxiv_citations
+        if min_citations not in (None, ''):
+            settings['min_arxiv_citations'] = int(min_citations)
+            
+    settings['bulk_search'] = bulk_search
+    # 可选的分片模式：每个会议单独发起 bulk 查询并发执行
+    settings['shard_by_venue'] = bool(data.get('shard_by_venue', False))
+    # 可选的两阶段获取：先只请求标题/会议/年份，初筛后再批量获取摘要和作者
+    settings['two_phase_fetch'] = bool(data.get('two_phase_fetch', False))
+    # 排序选项 (relevance / citations / recent)，决定达到上限时保留哪些论文；
+    # 留空时使用搜索模式的默认排序 (bulk 搜索按引用数，非 bulk 搜索按相关度)
+    if data.get('sort'):
+        settings['sort'] = data['sort']
+    # 离线模式：在本地论文索引中重新筛选之前获取过的论文，不请求 API (用于修改摘要关键词后快速重新筛选)
+    settings['offline'] = bool(data.get('offline', False))
+    return topic, settings
+
+def _group_semantic_results(papers):
+    """按 category 分组 Semantic Scholar 搜索结果 (论文记录的字段即前端使用的格式，直接返回)"""
+    from collections import defaultdict
+    grouped_results = defaultdict(list)
+    for p in papers:
+        grouped_results[p['category']].append(p)
+    return grouped_results
+
+def _parse_arxiv_request(data):
+    """把前端的 arXiv 时间窗口搜索请求转换为 (topics, settings)"""
+    print(f"DEBUG: 从前端接收到的 arXiv 搜索数据: {data}")
+    
+    directions = data.get('directions', [])
+    
+    settings = {
+        "search_window_days": int(data.get('days', 7)),
+        "limit_per_topic": int(data.get('limit', 100)),
+        "min_authors": int(data.get('min_authors', 1)),
+        "merge_queries": bool(data.get('merge_queries', False)),
+        "offline": bool(data.get('offline', False))
+    }
+
+    topics = []
+    for i, direction in enumerate(directions):
+        direction_name = direction.get('name') or f"方向 {i+1}"
+        
+        # 将前端数据转换为 arxiv_multi_search 脚本期望的格式
+        topics.append({
+            "direction": direction_name,
+            "query_keywords": [[kw.strip() for kw in line.split(',')] for line in direction.get('query_keywords', '').strip().split('\n') if line.strip()],
+            "abstract_keywords": [[kw.strip() for kw in line.split(',')] for line in direction.get('abstract_keywords', '').strip().split('\n') if line.strip()],
+            "subjects": [s.strip() for s in direction.get('subjects', '').split(',') if s.strip()]
+        })
+    return topics, settings
+
 @app.route('/api/search', methods=['POST'])
 def handle_search():
     """处理前端发来的搜索请求"""
@@ -168,66 +261,11 @@ def handle_search():
         data = request.json
         source = data.get('source')
 
-        query_keywords_raw = data.get('query_keywords', '').strip()
-        abstract_keywords_raw = data.get('abstract_keywords', '').strip()
-
-        query_keywords = [[kw.strip() for kw in line.split(',')] for line in query_keywords_raw.split('\n') if line.strip()]
-        abstract_keywords = [[kw.strip() for kw in line.split(',')] for line in abstract_keywords_raw.split('\n') if line.strip()]
-        
-        min_year = int(data.get('year')) if data.get('year') else None
-        
-        # 解析新增的参数
-        limit = int(data.get('limit', 100))
-        title_exclude_keywords_raw = data.get('title_exclude_keywords', '').strip()
-        title_exclude_keywords = [line.strip() for line in title_exclude_keywords_raw.split('\n') if line.strip()]
-        bulk_search = data.get('bulk_search', True) # 默认为 True
-        
-        print(f"DEBUG: 从前端接收到的数据: \nquery_keywords: {query_keywords}\nabstract_keywords: {abstract_keywords}\nyear: {min_year}\nvenues: {data.get('venues', [])}\nlimit: {limit}\ntitle_exclude_keywords: {title_exclude_keywords}\nbulk_search: {bulk_search}") # 调试打印
-
-        results = []
         formatted_results = []
         if source == 'semantic_scholar':
-            topic = {
-                "direction": "Web Search",
-                "query_keywords": query_keywords,
-                "abstract_keywords": abstract_keywords,
-                "venues_to_search": data.get('venues', [])
-            }
-            settings = {
-                "min_year": min_year, 
-                "limit_per_topic": limit
-            }
-            # 只有当用户实际提供了排除关键词时，才将其添加到 settings 中以覆盖默认值
-            if title_exclude_keywords:
-                settings['title_exclude_keywords'] = title_exclude_keywords
-
-            # 如果 arXiv 被选为 venue，则添加最低引用数
-            if 'arXiv' in data.get('venues', []):
-                min_citations = data.get('min_arxiv_citations')
-                if min_citations:
-                    settings['min_arxiv_citations'] = int(min_citations)
-                    
-            settings['bulk_search'] = bulk_search
+            topic, settings = _parse_semantic_request(data)
             papers = semantic_scholar_run_search(topic, settings, VENUE_DEFINITIONS)
-            
-            # 按 category 分组
-            from collections import defaultdict
-            grouped_results = defaultdict(list)
-            for p in papers:
-                category = p.get('category', 'Others')
-                formatted_paper = {
-                    'title': p.get('title'),
-                    'author': p.get('author'),
-                    'year': p.get('year'),
-                    'venue_name': p.get('venue_name'),
-                    'category': category, # 确保 category 字段被包含
-                    'url': p.get('url'),
-                    'matched_keywords': p.get('matched_abstract_keywords', ''),
-                    'citations': p.get('citations', 0)
-                }
-                grouped_results[category].append(formatted_paper)
-
-            formatted_results = grouped_results
+            formatted_results = _group_semantic_results(papers)
         
         return jsonify(formatted_results)
 
@@ -236,36 +274,62 @@ def handle_search():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+def _sse_event(event, data):
+    """按 Server-Sent Events 格式编码一个事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=json_default)}\n\n"
+
+@app.route('/api/search_stream', methods=['POST'])
+def handle_search_stream():
+    """
+    流式版本的 Semantic Scholar 搜索 (text/event-stream)。
+    每篇论文通过会议和摘要筛选后立即以 `paper` 事件推送，由前端按 category 分组并逐行渲染；
+    期间穿插 `progress` 事件，结束时发送 `done` 事件，出错时发送 `error` 事件。
+    """
+    data = request.json or {}
+    if data.get('source', 'semantic_scholar') != 'semantic_scholar':
+        return jsonify({"error": f"不支持的数据源: {data.get('source')}"}), 400
+    topic, settings = _parse_semantic_request(data)
+
+    def generate():
+        pending_progress = []
+
+        def report(event):
+            event.pop('new_papers', None)
+            pending_progress.append(event)
+
+        papers = semantic_scholar_iter_search(topic, settings, VENUE_DEFINITIONS, progress=report)
+        total = 0
+        try:
+            for p in papers:
+                while pending_progress:
+                    yield _sse_event('progress', pending_progress.pop(0))
+                total += 1
+                yield _sse_event('paper', p)
+            while pending_progress:
+                yield _sse_event('progress', pending_progress.pop(0))
+            yield _sse_event('done', {'total': total})
+        except Exception as e:
+            print("流式搜索时发生错误:")
+            traceback.print_exc()
+            yield _sse_event('error', {'error': str(e)})
+        finally:
+            # 客户端断开连接时关闭搜索生成器，停止后续的翻页请求
+            papers.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+
 @app.route('/api/arxiv_search', methods=['POST'])
 def handle_arxiv_search():
     """处理前端发来的包含多个搜索方向的 arXiv 时间窗口搜索请求"""
     try:
-        data = request.json
-        print(f"DEBUG: 从前端接收到的 arXiv 搜索数据: {data}")
-        
-        directions = data.get('directions', [])
-        
-        settings = {
-            "search_window_days": int(data.get('days', 7)),
-            "limit_per_topic": int(data.get('limit', 100)),
-            "min_authors": int(data.get('min_authors', 1))
-        }
+        topics, settings = _parse_arxiv_request(request.json)
 
-        grouped_results = {}
-        for i, direction in enumerate(directions):
-            direction_name = direction.get('name') or f"方向 {i+1}"
-            
-            # 将前端数据转换为 arxiv_multi_search 脚本期望的格式
-            topic = {
-                "direction": direction_name,
-                "query_keywords": [[kw.strip() for kw in line.split(',')] for line in direction.get('query_keywords', '').strip().split('\n') if line.strip()],
-                "abstract_keywords": [[kw.strip() for kw in line.split(',')] for line in direction.get('abstract_keywords', '').strip().split('\n') if line.strip()],
-                "subjects": [s.strip() for s in direction.get('subjects', '').split(',') if s.strip()]
-            }
-
-            # 调用导入的搜索函数
-            papers = arxiv_run_search(topic, settings)
-            grouped_results[direction_name] = papers
+        # 并发执行所有方向的搜索 (共享同一个节流的 arXiv 客户端)
+        grouped_results = arxiv_run_searches(topics, settings)
         
         return jsonify(grouped_results)
 
@@ -274,105 +338,183 @@ def handle_arxiv_search():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/download', methods=['POST'])
-def handle_download():
+def _flatten_grouped(data):
+    """把按分组组织的结果 ({分组: [论文, ...]}) 展开为论文列表；本身就是列表时原样返回"""
+    if isinstance(data, dict):
+        return [paper for papers in data.values() for paper in papers]
+    return list(data or [])
+
+@app.route('/api/merge', methods=['POST'])
+def handle_merge():
     """
-    处理前端发来的论文下载请求。
-    后台执行下载，生成一份带下载状态的Excel清单，然后将所有文件打包成ZIP。
+    合并前端已有的 Semantic Scholar 与 arXiv 搜索结果 (分组字典或列表)，
+    同一篇论文的会议版本与预印本合并为一条记录，同时带有会议信息和 pdf_url。
+    """
+    try:
+        data = request.json or {}
+        papers, stats = merge_search_results(_flatten_grouped(data.get('semantic')), _flatten_grouped(data.get('arxiv')))
+        print(f"--- [Merge] 输入 {stats['input']} 条，合并后 {stats['output']} 条，其中 {stats['both_sources']} 条同时出现在两个来源 ---")
+        return jsonify({"papers": papers, "stats": stats})
+    except Exception as e:
+        print("合并搜索结果时发生错误:")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+# --- 后台搜索任务 ---
+
+def _semantic_search_job(job, topic, settings):
+    """在后台运行 Semantic Scholar 搜索，并把进度和部分结果写入 job"""
+    def report(event):
+        new_papers = event.pop('new_papers', None) or []
+        job.update_progress(**event)
+        for p in new_papers:
+            job.add_partial(p['category'], [p])
+
+    papers = semantic_scholar_run_search(topic, settings, VENUE_DEFINITIONS, progress=report)
+    return _group_semantic_results(papers)
+
+def _arxiv_search_job(job, topics, settings):
+    """在后台运行多方向 arXiv 搜索，每完成一个方向即写入部分结果"""
+    def report(event):
+        new_papers = event.pop('new_papers', None)
+        group = event.pop('group', None)
+        job.update_progress(**event)
+        if group is not None:
+            job.add_partial(group, new_papers)
+
+    return arxiv_run_searches(topics, settings, progress=report)
+
+@app.route('/api/jobs/search', methods=['POST'])
+def submit_search_job():
+    """提交后台 Semantic Scholar 搜索任务，立即返回任务 ID"""
+    try:
+        data = request.json
+        if data.get('source', 'semantic_scholar') != 'semantic_scholar':
+            return jsonify({"error": f"不支持的数据源: {data.get('source')}"}), 400
+        topic, settings = _parse_semantic_request(data)
+        job = JOB_MANAGER.submit('search', _semantic_search_job, topic, settings)
+        return jsonify({"job_id": job.id}), 202
+    except Exception as e:
+        print("提交搜索任务时发生错误:")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/arxiv_search', methods=['POST'])
+def submit_arxiv_search_job():
+    """提交后台 arXiv 时间窗口搜索任务，立即返回任务 ID"""
+    try:
+        topics, settings = _parse_arxiv_request(request.json)
+        job = JOB_MANAGER.submit('arxiv_search', _arxiv_search_job, topics, settings)
+        return jsonify({"job_id": job.id}), 202
+    except Exception as e:
+        print("提交 arXiv 搜索任务时发生错误:")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """查询后台任务的状态、进度 (阶段、已获取/已筛选数量) 以及部分或最终结果"""
+    job = JOB_MANAGER.get(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在或已过期。"}), 404
+    include_partial = request.args.get('partial', '1') != '0'
+    return jsonify(job.to_dict(include_partial=include_partial))
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """取消后台任务"""
+    if not JOB_MANAGER.cancel(job_id):
+        return jsonify({"error": "任务不存在或已过期。"}), 404
+    return jsonify({"job_id": job_id, "status": "cancelling"})
+
+def _download_job(job, papers_data, lang, is_arxiv):
+    """
+    在后台下载论文，生成一份带下载状态的Excel清单，然后将所有文件打包成ZIP并存入下载文件存储。
+    每处理完一篇论文更新一次进度，取消任务后尚未开始的下载会被跳过。
     """
     import tempfile
     import shutil
     import os
     from semantic_scholar_search import download_papers
 
+    total_papers = sum(len(papers) for papers in papers_data.values())
+    job.update_progress(phase='downloading', completed=0, total=total_papers, successful=0)
     download_temp_dir = tempfile.mkdtemp()
-    
     try:
-        request_data = request.json
-        papers_data = request_data.get('data', {})
-        lang = request_data.get('lang', 'zh')
-        is_arxiv = request_data.get('is_arxiv', False)
-
-        if not papers_data:
-            return jsonify({"status": "error", "message": "没有提供可下载的数据。"}), 400
-        
         start_time = time.time()
-        print("--- [Download] 开始下载论文 ---")
-        
-        # 1. 下载论文，并获取成功下载的文件名列表
-        successful_filenames = download_papers(papers_data, download_temp_dir)
+        print(f"--- [Download {job.id}] 开始下载论文 ---")
+
+        # 1. 下载论文，并获取成功下载的文件名列表 (已在本地 PDF 存储中的论文记录在 stored_files 中，打包时直接读取)
+        stored_files = {}
+        successful_filenames = download_papers(
+            papers_data, download_temp_dir, progress=lambda event: job.update_progress(**event),
+            store_manifest=stored_files,
+        )
         num_successful = len(successful_filenames)
-        total_papers = sum(len(papers) for papers in papers_data.values())
 
-        end_time = time.time()
-        duration = end_time - start_time
-        print(f"--- [Download] 论文下载后台处理完成，耗时: {duration:.2f} 秒 ---")
-        
+        duration = time.time() - start_time
+        print(f"--- [Download {job.id}] 论文下载后台处理完成，耗时: {duration:.2f} 秒 ---")
+
         # 2. 生成包含下载状态的 Excel 报告
-        excel_report_io = _create_excel_report(papers_data, lang, successful_filenames, is_arxiv)
+        job.update_progress(phase='packaging')
+        excel_report_io = _create_report(papers_data, lang, successful_filenames, is_arxiv)
         excel_filename = "download_report.xlsx"
         with open(os.path.join(download_temp_dir, excel_filename), 'wb') as f:
             f.write(excel_report_io.getvalue())
-        print(f"--- [Download] 已生成带状态的报告 '{excel_filename}' ---")
-
-        # 3. 如果目录为空（可能只生成了报告但没下载PDF），也继续打包
-        if not os.listdir(download_temp_dir):
-            shutil.rmtree(download_temp_dir)
-            return jsonify({
-                "status": "success", 
-                "message": "未成功下载任何论文，但报告已生成。",
-                "successful": num_successful,
-                "total": total_papers
-            })
-            
-        # 4. 将临时目录打包成 zip 文件
-        zip_filename_base = f"scholar_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-        zip_temp_dir = tempfile.gettempdir()
-        zip_path_base = os.path.join(zip_temp_dir, zip_filename_base)
-        zip_path = shutil.make_archive(zip_path_base, 'zip', download_temp_dir)
+        print(f"--- [Download {job.id}] 已生成带状态的报告 '{excel_filename}' ---")
 
+        # 3. 将临时目录打包成 zip 文件 (报告总是存在，所以即使没有下载到论文也会打包)，并移入下载文件存储
+        job.check_cancelled()
+        store = get_artifact_store()
         file_id = str(uuid.uuid4())
-        TEMP_DOWNLOAD_FILES[file_id] = {
-            "path": zip_path,
-            "filename": os.path.basename(zip_path)
-        }
-        
-        return jsonify({
+        zip_path = write_download_zip(store.staging_path(file_id), download_temp_dir, stored_files)
+        zip_filename = f"scholar_search_{datetime.now().strftime('%Y%m%d_%H%M%S')}.zip"
+        store.add(file_id, zip_path, zip_filename, successful=num_successful, total=total_papers)
+
+        return {
             "status": "success",
+            "message": None if num_successful else "未成功下载任何论文，但报告已生成。",
             "successful": num_successful,
             "total": total_papers,
             "file_id": file_id
-        })
+        }
+    finally:
+        shutil.rmtree(download_temp_dir, ignore_errors=True)
+
+@app.route('/api/download', methods=['POST'])
+def handle_download():
+    """
+    处理前端发来的论文下载请求。
+    立即返回后台下载任务的 ID；前端通过 /api/jobs/<job_id> 查询逐篇的下载进度，
+    任务完成后结果中的 file_id 可用于 /api/download_file/<file_id>。
+    """
+    try:
+        request_data = request.json
+        papers_data = request_data.get('data', {})
+        lang = request_data.get('lang', 'zh')
+        is_arxiv = request_data.get('is_arxiv', False)
+
+        if not papers_data:
+            return jsonify({"status": "error", "message": "没有提供可下载的数据。"}), 400
+
+        job = JOB_MANAGER.submit('download', _download_job, papers_data, lang, is_arxiv)
+        return jsonify({"status": "accepted", "job_id": job.id}), 202
 
     except Exception as e:
         print("处理下载请求时发生错误:")
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
-    finally:
-        shutil.rmtree(download_temp_dir, ignore_errors=True)
 
 
 @app.route('/api/download_file/<file_id>')
 def download_file(file_id):
     """
-    根据 file_id 提供 zip 文件下载，并在下载后清理文件。
+    根据 file_id 提供 zip 文件下载。
+    文件保存在本地下载文件存储中，在过期或超出空间上限之前可以重复下载，服务重启后仍然有效。
     """
-    import os
-    from flask import after_this_request
-
-    file_info = TEMP_DOWNLOAD_FILES.pop(file_id, None)
-
-    if file_info and os.path.exists(file_info['path']):
-        
-        @after_this_request
-        def cleanup(response):
-            try:
-                os.remove(file_info['path'])
-                print(f"--- [Download] 清理临时文件: {file_info['path']} ---")
-            except Exception as e:
-                print(f"--- [Download] 清理临时文件失败: {e} ---")
-            return response
+    file_info = get_artifact_store().get(file_id)
 
+    if file_info:
         return send_file(
             file_info['path'],
             mimetype='application/zip',
@@ -384,26 +526,40 @@ def download_file(file_id):
         return "File not found or has expired.", 404
 
 
+@app.route('/api/export_formats', methods=['GET'])
+def export_formats():
+    """返回当前环境可用的导出格式 (Parquet 需要安装 pyarrow)"""
+    return jsonify({"formats": available_export_formats(), "default": DEFAULT_EXPORT_FORMAT})
+
+
+def _export_response(is_arxiv):
+    """根据请求中的 format 参数 (xlsx / csv / jsonl / parquet) 导出分组的搜索结果（不含下载状态）"""
+    request_data = request.json
+    lang = request_data.get('lang', 'zh')
+    grouped_data = request_data.get('data', {})
+    fmt = request_data.get('format') or DEFAULT_EXPORT_FORMAT
+    try:
+        check_export_format(fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    report_io = _create_report(grouped_data, lang, downloaded_files=None, is_arxiv=is_arxiv, fmt=fmt)
+
+    date_str = datetime.now().strftime('%Y%m%d')
+    prefix = "arxiv_report" if is_arxiv else "scholar_report"
+    return send_file(
+        report_io,
+        mimetype=export_mimetype(fmt),
+        as_attachment=True,
+        download_name=export_filename(f"{prefix}_{date_str}", fmt)
+    )
+
+
 @app.route('/api/export', methods=['POST'])
 def export_to_excel():
-    """将分组的搜索结果导出为 Excel 文件（不含下载状态）"""
+    """将分组的搜索结果导出为 Excel 或其他格式的文件（不含下载状态）"""
     try:
-        request_data = request.json
-        lang = request_data.get('lang', 'zh')
-        grouped_data = request_data.get('data', {})
-        
-        excel_io = _create_excel_report(grouped_data, lang, downloaded_files=None, is_arxiv=False)
-        
-        date_str = datetime.now().strftime('%Y%m%d')
-        filename = f"scholar_report_{date_str}.xlsx"
-        
-        return send_file(
-            excel_io,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
-
+        return _export_response(is_arxiv=False)
     except Exception as e:
         print("导出 Excel 时发生错误:")
         traceback.print_exc()
@@ -412,24 +568,9 @@ def export_to_excel():
 
 @app.route('/api/arxiv_export', methods=['POST'])
 def export_arxiv_to_excel():
-    """将分组的 arXiv 搜索结果导出为 Excel 文件（不含下载状态）"""
+    """将分组的 arXiv 搜索结果导出为 Excel 或其他格式的文件（不含下载状态）"""
     try:
-        request_data = request.json
-        lang = request_data.get('lang', 'zh')
-        grouped_data = request_data.get('data', {})
-
-        excel_io = _create_excel_report(grouped_data, lang, downloaded_files=None, is_arxiv=True)
-        
-        date_str = datetime.now().strftime('%Y%m%d')
-        filename = f"arxiv_report_{date_str}.xlsx"
-        
-        return send_file(
-            excel_io,
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            as_attachment=True,
-            download_name=filename
-        )
-
+        return _export_response(is_arxiv=True)
     except Exception as e:
         print("导出 arXiv Excel 时发生错误:")
         traceback.print_exc()
@@ -1,14 +1,20 @@
 import time
 import argparse
-import pandas as pd
 import arxiv
 import json
-import re
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
-from openpyxl.utils import get_column_letter
 
 # 从 semantic_scholar_search 模块导入通用的下载函数
 from semantic_scholar_search import download_papers, auto_git_pull
+from response_cache import ResponseCache, get_response_cache
+from arxiv_paper_store import get_paper_store
+from keyword_matcher import AbstractKeywordMatcher
+from paper_index import PaperIndex, get_paper_index
+from paper_record import ArxivRecord
+from report_export import DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, check_export_format, export_filename, safe_sheet_name, write_report
 
 # 用于筛选的顶级会议/期刊的映射关系
 # 格式为: (正式显示名称, [所有相关的小写搜索关键词])
@@ -27,6 +33,52 @@ CONFERENCE_MAPPING = [
     ('KDD', ['kdd']),
 ]
 
+# arXiv API 要求同一客户端连续请求之间至少间隔 3 秒
+ARXIV_REQUEST_INTERVAL = 3.0
+# 同时执行的搜索方向数量上限
+DEFAULT_MAX_CONCURRENT_DIRECTIONS = 4
+# 合并查询模式下，单个查询串最多包含的关键词组数量 (避免查询串过长)
+MAX_GROUPS_PER_MERGED_QUERY = 30
+
+
+class ThrottledArxivClient(arxiv.Client):
+    """
+    可在多个线程间共享的 arXiv 客户端。
+    所有线程在发出请求前先在同一个节流器上预约时间槽，保证整体请求频率
+    不超过 arXiv 的限制；网络等待本身则可以在线程之间重叠。
+    """
+
+    def __init__(self, request_interval=ARXIV_REQUEST_INTERVAL, **kwargs):
+        # 关闭基类自带的（非线程安全的）延时逻辑，改由下面的共享节流器负责
+        super().__init__(delay_seconds=0, **kwargs)
+        self.request_interval = request_interval
+        self._throttle_lock = threading.Lock()
+        self._next_request_at = 0.0
+
+    def _parse_feed(self, url, first_page=True, _try_index=0):
+        with self._throttle_lock:
+            now = time.monotonic()
+            scheduled_at = max(now, self._next_request_at)
+            self._next_request_at = scheduled_at + self.request_interval
+        if scheduled_at > now:
+            time.sleep(scheduled_at - now)
+        # 基类在重试时会再次调用 self._parse_feed，因此每次重试同样受节流控制
+        return super()._parse_feed(url, first_page=first_page, _try_index=_try_index)
+
+
+_shared_client = None
+_shared_client_lock = threading.Lock()
+
+
+def get_arxiv_client():
+    """返回进程内共享的节流 arXiv 客户端（首次调用时创建）。"""
+    global _shared_client
+    with _shared_client_lock:
+        if _shared_client is None:
+            _shared_client = ThrottledArxivClient()
+        return _shared_client
+
+
 def build_query(keyword_groups):
     """
     根据“组内AND，组间OR”的逻辑构建arXiv搜索查询字符串。
@@ -49,7 +101,191 @@ def build_query(keyword_groups):
     return " OR ".join(outer_groups)
 
 
-def search_arxiv(query, direction_name, start_date, abstract_keyword_groups=None, subjects=None, min_authors=1, limit=1000):
+def _project_result(result):
+    """把 arxiv.Result 投影为只包含筛选和输出所需字段的字典。"""
+    return {
+        'entry_id': result.entry_id,
+        'title': result.title,
+        'authors': [author.name for author in result.authors],
+        'summary': result.summary,
+        'published': result.published,
+        'updated': result.updated,
+        'primary_category': result.primary_category,
+        'categories': list(result.categories),
+        'pdf_url': result.pdf_url,
+        'doi': result.doi,
+    }
+
+
+def _entry_to_cache(entry):
+    return dict(entry, published=entry['published'].isoformat(), updated=entry['updated'].isoformat())
+
+
+def _entry_from_cache(cached):
+    return dict(cached, published=datetime.fromisoformat(cached['published']), updated=datetime.fromisoformat(cached['updated']))
+
+
+def _index_row(entry):
+    """把论文条目转换为本地论文索引的一行。"""
+    return {
+        'paper_id': entry['entry_id'],
+        'title': entry['title'],
+        'abstract': entry['summary'],
+        'venue': 'arXiv',
+        'year': entry['published'].year,
+        'authors': ', '.join(entry['authors']),
+        'updated': entry['updated'].isoformat(),
+        'payload': _entry_to_cache(entry),
+    }
+
+
+def _index_entries(query, entries):
+    """把获取到的论文条目写入本地论文索引 (由后台线程写入，不阻塞搜索)。"""
+    scope_key = PaperIndex.make_scope_key('arxiv', query=query)
+    get_paper_index().add('arxiv', [_index_row(entry) for entry in entries], scope_key, description=query)
+
+
+def _load_indexed_entries(query, label, start_date, limit=None):
+    """
+    离线模式：从本地论文索引读取该查询获取过、且在时间窗口内最新的 limit 条论文条目 (按更新时间倒序)，
+    与在线获取的论文相同，不请求 API。索引中没有该查询时抛出 ValueError。
+    """
+    index = get_paper_index()
+    scope_key = PaperIndex.make_scope_key('arxiv', query=query)
+    if not index.has_scope(scope_key):
+        raise ValueError(f"[{label}] 本地索引中没有该查询的结果，请先在线执行一次相同的搜索。")
+    entries = [_entry_from_cache(payload) for payload, _ in index.iter_scope(scope_key, since=start_date.isoformat())]
+    entries.sort(key=lambda entry: entry['updated'], reverse=True)
+    if limit:
+        entries = entries[:limit]
+    print(f"[{label}] 离线模式: 本地索引中时间窗口内共 {len(entries)} 篇")
+    return entries
+
+
+def _iter_window_results(client, search, start_date, stats):
+    """
+    惰性地逐页消费 arXiv 结果，遇到第一篇早于 start_date 的论文即停止。
+    由于结果按更新日期倒序排列，之后的页面无需再请求。
+    stats 会被更新为已消费的条目数以及是否提前终止。
+    """
+    for result in client.results(search):
+        stats['consumed'] += 1
+        # arxiv返回的是UTC时间，所以我们也用UTC时间来比较
+        if result.updated < start_date:
+            stats['stopped_early'] = True
+            return
+        yield _project_result(result)
+
+
+def _iter_window_entries(query, label, start_date, limit, client, use_cache=True):
+    """
+    返回某个查询在时间窗口内的论文条目。
+    优先读取本地响应缓存；未命中时流式请求 API，在完整获取后写回缓存。
+    """
+    cache = get_response_cache() if use_cache else None
+    # 起始时间精确到小时作为缓存键，缓存结果在读取时再按精确的 start_date 过滤
+    cache_key = ResponseCache.make_key('arxiv', query=query, limit=limit, start=start_date.strftime('%Y-%m-%dT%H'))
+    cached = cache.get('arxiv', cache_key) if cache else None
+    if cached is not None:
+        print(f"[{label}] 命中本地缓存 ({len(cached)} 条)")
+        for entry in map(_entry_from_cache, cached):
+            if entry['updated'] >= start_date:
+                yield entry
+        return
+
+    # 始终按最新更新排序，以最高效地找到新论文
+    search = arxiv.Search(
+        query=query,
+        max_results=limit,
+        sort_by=arxiv.SortCriterion.LastUpdatedDate
+    )
+    fetch_stats = {'consumed': 0, 'stopped_early': False}
+    fetched = []
+    for entry in _iter_window_results(client, search, start_date, fetch_stats):
+        fetched.append(entry)
+        yield entry
+
+    _report_fetch_stats(label, fetch_stats, client.page_size, limit)
+    if cache:
+        cache.set('arxiv', cache_key, [_entry_to_cache(entry) for entry in fetched])
+
+
+def _report_fetch_stats(direction_name, stats, page_size, limit):
+    """打印实际请求的页数以及因提前终止而省去的页数。"""
+    pages_fetched = math.ceil(stats['consumed'] / page_size) if stats['consumed'] else 0
+    if stats['stopped_early'] and limit:
+        pages_skipped = max(0, math.ceil(limit / page_size) - pages_fetched)
+        print(f"[{direction_name}] 已请求 {pages_fetched} 页 ({stats['consumed']} 条)，因超出时间窗口提前终止，跳过 {pages_skipped} 页。")
+    else:
+        print(f"[{direction_name}] 已请求 {pages_fetched} 页 ({stats['consumed']} 条)。")
+
+
+def _load_incremental_entries(query, label, start_date, limit, client):
+    """
+    增量模式：只向 API 请求高水位线之后更新的论文，写入本地论文库后，
+    返回库中仍在时间窗口内最新的 limit 条 (按更新时间倒序)，与非增量模式获取的论文相同。
+    """
+    store = get_paper_store()
+    query_key = store.make_key(query)
+    high_water = store.get_high_water(query_key)
+    fetch_from = max(start_date, high_water) if high_water else start_date
+    if fetch_from > start_date:
+        print(f"[{label}] 增量模式: 只获取 {fetch_from.strftime('%Y-%m-%d %H:%M')} (UTC) 之后更新的论文")
+
+    new_entries = list(_iter_window_entries(query, label, fetch_from, limit, client, use_cache=False))
+    truncated = bool(limit) and len(new_entries) >= limit
+    if truncated:
+        print(f"[{label}] 本次获取达到上限 {limit} 篇，高水位线之后可能还有论文未被获取，高水位线保持不变。")
+    store.add_entries(query_key, new_entries, truncated=truncated)
+
+    entries = store.load_entries(query_key, since=start_date, limit=limit)
+    print(f"[{label}] 增量模式: 新获取 {len(new_entries)} 篇，与本地论文库合并后窗口内共 {len(entries)} 篇")
+    return entries
+
+
+def _filter_paper(paper, direction_name, abstract_matcher=None, subjects=None, min_authors=1):
+    """
+    对单篇 arXiv 论文条目 (见 _project_result) 执行作者数、学科分类和摘要关键词筛选。
+    abstract_matcher 为预编译的 AbstractKeywordMatcher。
+    通过筛选时返回论文记录 (ArxivRecord)，否则返回 None。
+    """
+    # 作者数量筛选
+    if len(paper['authors']) < min_authors:
+        return None
+
+    # 学科分类筛选 (如果配置了)
+    if subjects:
+        # any() 检查论文的分类中是否至少有一个在我们的目标学科列表里
+        if not any(cat in subjects for cat in paper['categories']):
+            return None
+
+    matched_keywords_in_abstract = []
+    if abstract_matcher:
+        # 组间OR: 只要有一个内层分组(AND group)匹配成功，就通过，并记录所有匹配上的词
+        matched_keywords_in_abstract = abstract_matcher.match(paper['summary'])
+        if not matched_keywords_in_abstract:
+            return None
+    
+    return ArxivRecord(
+        direction=direction_name,
+        title=paper['title'],
+        author=', '.join(paper['authors']),
+        year=paper['published'].year,
+        url=paper['entry_id'],
+        summary=paper['summary'],
+        venue_name='arXiv',
+        published=paper['published'].strftime('%Y-%m-%d'),
+        updated=paper['updated'].strftime('%Y-%m-%d'),
+        primary_category=paper['primary_category'],
+        categories=", ".join(paper['categories']),
+        pdf_url=paper['pdf_url'],
+        doi=paper['doi'],
+        matched_keywords=", ".join(sorted(list(set(matched_keywords_in_abstract)))),
+    )
+
+
+def search_arxiv(query, direction_name, start_date, abstract_keyword_groups=None, subjects=None, min_authors=1, limit=1000, client=None, use_cache=True, incremental=False,
+                 offline=False, index_papers=True):
     """
     在 arXiv 上搜索指定日期之后发布的论文。
 
@@ -61,100 +297,51 @@ def search_arxiv(query, direction_name, start_date, abstract_keyword_groups=None
         subjects (list, optional): 论文必须匹配的学科分类列表。
         min_authors (int, optional): 论文的最少作者数量。
         limit (int, optional): 从API获取的最大论文数。
+        client (arxiv.Client, optional): 使用的客户端，默认为进程内共享的节流客户端。
+        use_cache (bool, optional): 是否使用本地响应缓存。
+        incremental (bool, optional): 是否使用增量模式，只获取上次运行之后的新论文。
+        offline (bool, optional): 离线模式，在本地论文索引中该查询获取过的论文上重新筛选，不请求 API。
+        index_papers (bool, optional): 是否把获取到的论文写入本地论文索引。
 
     Returns:
         list: 符合条件的论文信息字典列表。
     """
-    print(f"[{direction_name}] 正在从 arXiv 搜索 '{query}' (上限: {limit}篇)...")
-    
-    # 始终按最新更新排序，以最高效地找到新论文
-    search = arxiv.Search(
-        query=query,
-        max_results=limit,
-        sort_by=arxiv.SortCriterion.LastUpdatedDate
-    )
+    if offline:
+        print(f"[{direction_name}] 正在本地论文索引中重新筛选 '{query}'...")
+    else:
+        print(f"[{direction_name}] 正在从 arXiv 搜索 '{query}' (上限: {limit}篇)...")
+
+        client = client or get_arxiv_client()
 
-    print(f"[{direction_name}] 正在执行网络请求并加载数据...")
+        print(f"[{direction_name}] 正在以流式方式获取并筛选数据...")
     start_time = time.time()
+
+    abstract_matcher = AbstractKeywordMatcher(abstract_keyword_groups)
+    papers = []
+    fetched = []
+    # 离线模式下索引中没有该查询时直接抛出异常，而不是当作 API 错误返回空结果
+    # (时间窗口内的论文数量受 limit 限制，摘要直接用 abstract_matcher 重新匹配)
+    offline_entries = _load_indexed_entries(query, direction_name, start_date, limit) if offline else None
     try:
-        results_list = list(search.results())
+        if offline:
+            entries = offline_entries
+        elif incremental:
+            entries = _load_incremental_entries(query, direction_name, start_date, limit, client)
+        else:
+            entries = _iter_window_entries(query, direction_name, start_date, limit, client, use_cache=use_cache)
+        for entry in entries:
+            fetched.append(entry)
+            record = _filter_paper(entry, direction_name, abstract_matcher, subjects, min_authors)
+            if record:
+                papers.append(record)
     except Exception as e:
         print(f"[{direction_name}] 调用 arXiv API 时出错: {e}")
         return []
-    print(f"[{direction_name}] API 调用及数据加载耗时: {time.time() - start_time:.2f} 秒")
-
-    print(f"[{direction_name}] 获取了 {len(results_list)} 篇相关论文，开始在内存中根据日期和关键词筛选...")
-    filter_start_time = time.time()
-
-    papers = []
-    
-    for paper in results_list:
-        # 核心筛选逻辑：只保留在时间窗口内更新的论文
-        # arxiv返回的是UTC时间，所以我们也用UTC时间来比较
-        if paper.updated < start_date:
-            # 由于结果是按更新日期排序的，一旦遇到一篇过早的论文，
-            # 后面的基本也都不符合要求了，可以提前终止循环以提高效率。
-            break
-
-        # 作者数量筛选
-        if len(paper.authors) < min_authors:
-            continue
+    finally:
+        if fetched and index_papers and not offline:
+            _index_entries(query, fetched)
 
-        # 学科分类筛选 (如果配置了)
-        if subjects:
-            # any() 检查论文的分类中是否至少有一个在我们的目标学科列表里
-            if not any(cat in subjects for cat in paper.categories):
-                continue
-
-        summary_lower = paper.summary.lower()
-        matched_keywords_in_abstract = []
-        if abstract_keyword_groups:
-            # 组间OR: 只要有一个内层分组(AND group)匹配成功，就通过
-            # 这里我们不能用 any()，因为要记录所有匹配上的词
-            for group in abstract_keyword_groups:
-                all_kws_in_group_matched = True
-                for kw in group:
-                    is_whole_word = kw.endswith('*')
-                    clean_kw = kw.rstrip('*').lower()
-                    
-                    if not clean_kw: continue
-
-                    if is_whole_word:
-                        # 全词匹配
-                        if not re.search(r'\b' + re.escape(clean_kw) + r'\b', summary_lower):
-                            all_kws_in_group_matched = False
-                            break
-                    else:
-                        # 子字符串匹配
-                        if clean_kw not in summary_lower:
-                            all_kws_in_group_matched = False
-                            break
-                
-                if all_kws_in_group_matched:
-                    matched_keywords_in_abstract.extend(group)
-            
-            if not matched_keywords_in_abstract:
-                continue
-        
-        papers.append({
-            'direction': direction_name,
-            'title': paper.title,
-            'author': ', '.join(author.name for author in paper.authors),
-            'year': paper.published.year,
-            'url': paper.entry_id,
-            'summary': paper.summary,
-            'venue_name': 'arXiv',
-            'published': paper.published.strftime('%Y-%m-%d'),
-            'updated': paper.updated.strftime('%Y-%m-%d'),
-            'primary_category': paper.primary_category,
-            'categories': ", ".join(paper.categories),
-            'pdf_url': paper.pdf_url,
-            'doi': paper.doi,
-            'matched_keywords': ", ".join(sorted(list(set(matched_keywords_in_abstract)))),
-        })
-
-    filter_end_time = time.time()
-    print(f"[{direction_name}] 内存筛选过程总耗时: {filter_end_time - filter_start_time:.2f} 秒")
+    print(f"[{direction_name}] 获取与筛选总耗时: {time.time() - start_time:.2f} 秒，保留 {len(papers)} 篇论文")
 
     return papers
 
@@ -188,9 +375,172 @@ def run_search(topic, settings):
         subjects=subjects,
         min_authors=min_authors,
         limit=limit_per_topic,
+        use_cache=settings.get('use_cache', True),
+        incremental=settings.get('incremental', False),
+        offline=settings.get('offline', False),
+        index_papers=settings.get('index_papers', True),
     )
 
 
+def plan_merged_queries(topics, max_groups=MAX_GROUPS_PER_MERGED_QUERY):
+    """
+    收集所有方向的查询关键词组并去重（忽略大小写和组内顺序），
+    合并为尽量少的 arXiv 查询字符串。
+    """
+    unique_groups = []
+    seen = set()
+    for topic in topics:
+        for group in topic.get('query_keywords', []):
+            terms = [kw.strip() for kw in group if kw.strip()]
+            key = tuple(sorted(kw.lower() for kw in terms))
+            if not terms or key in seen:
+                continue
+            seen.add(key)
+            unique_groups.append(terms)
+
+    return [build_query(unique_groups[i:i + max_groups]) for i in range(0, len(unique_groups), max_groups)]
+
+
+def _matches_query_groups(paper, keyword_groups):
+    """
+    在本地近似 arXiv 的查询语义（组内AND，组间OR）：
+    只要标题或摘要包含某一组中的全部关键词，即认为该论文属于这个方向。
+    """
+    text = f"{paper['title']} {paper['summary']}".lower()
+    return any(group and all(kw.strip().lower() in text for kw in group) for group in keyword_groups)
+
+
+def _fetch_window(query, label, start_date, limit, client, use_cache=True, incremental=False, offline=False, index_papers=True):
+    """获取某个查询在时间窗口内的全部论文条目 (流式获取，越过窗口即停止；离线模式下从本地论文索引读取)。"""
+    if offline:
+        return _load_indexed_entries(query, label, start_date, limit)
+    try:
+        if incremental:
+            entries = _load_incremental_entries(query, label, start_date, limit, client)
+        else:
+            entries = list(_iter_window_entries(query, label, start_date, limit, client, use_cache=use_cache))
+    except Exception as e:
+        print(f"[{label}] 调用 arXiv API 时出错: {e}")
+        return []
+    if index_papers:
+        _index_entries(query, entries)
+    return entries
+
+
+def run_merged_search(topics, settings, max_workers=None):
+    """
+    合并查询模式：把所有方向的查询关键词组合并成少数几个查询统一获取，
+    再在本地按各方向的查询词、学科分类和摘要关键词把论文分发回各个方向。
+    无论被多少个方向命中，每篇论文都只会从 API 获取一次。
+    返回一个按 topics 顺序排列的字典: {方向名称: 论文列表}。
+    """
+    search_window_days = settings.get('search_window_days', 7)
+    limit_per_topic = settings.get('limit_per_topic', 100)
+    min_authors = settings.get('min_authors', 1)
+    start_date = datetime.now(timezone.utc) - timedelta(days=search_window_days)
+
+    papers_by_direction = {}
+    active_topics = []
+    for topic in topics:
+        direction = topic.get('direction', '未命名方向')
+        papers_by_direction[direction] = []
+        if topic.get('query_keywords'):
+            active_topics.append(topic)
+        else:
+            print(f"跳过 '{direction}'，因为它没有定义 'query_keywords'。")
+
+    queries = plan_merged_queries(active_topics)
+    if not queries:
+        return papers_by_direction
+
+    # 合并后的查询覆盖了所有方向，因此总上限按方向数放大
+    limit = limit_per_topic * len(active_topics)
+    client = get_arxiv_client()
+    if max_workers is None:
+        max_workers = settings.get('max_concurrent_directions', DEFAULT_MAX_CONCURRENT_DIRECTIONS)
+    max_workers = max(1, min(int(max_workers), len(queries)))
+
+    print(f"--- 合并查询模式: {len(active_topics)} 个方向的关键词组被合并为 {len(queries)} 个查询 (上限: {limit}篇) ---")
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_fetch_window, query, f"合并查询 {i + 1}/{len(queries)}", start_date, limit, client,
+                            settings.get('use_cache', True), settings.get('incremental', False),
+                            settings.get('offline', False), settings.get('index_papers', True))
+            for i, query in enumerate(queries)
+        ]
+
+    unique_papers = {}
+    for future in futures:
+        for entry in future.result():
+            unique_papers.setdefault(entry['entry_id'], entry)
+    print(f"--- 合并查询共获取 {len(unique_papers)} 篇独立论文，耗时 {time.time() - start_time:.2f} 秒，开始分发到各方向 ---")
+
+    # 每个方向的摘要关键词匹配器只构建一次
+    matchers = [AbstractKeywordMatcher(topic.get('abstract_keywords', [])) for topic in active_topics]
+    for paper in sorted(unique_papers.values(), key=lambda p: p['updated'], reverse=True):
+        for topic, abstract_matcher in zip(active_topics, matchers):
+            if not _matches_query_groups(paper, topic['query_keywords']):
+                continue
+            direction = topic.get('direction', '未命名方向')
+            record = _filter_paper(
+                paper,
+                direction,
+                abstract_matcher=abstract_matcher,
+                subjects=topic.get('subjects', []),
+                min_authors=min_authors,
+            )
+            if record:
+                papers_by_direction[direction].append(record)
+
+    for direction, papers in papers_by_direction.items():
+        print(f"[{direction}] 保留 {len(papers)} 篇论文")
+    return papers_by_direction
+
+
+def run_searches(topics, settings, max_workers=None, progress=None):
+    """
+    并发执行多个搜索方向，所有方向共享同一个节流 arXiv 客户端。
+    若 settings 中开启了 merge_queries，则改用合并查询模式 (见 run_merged_search)。
+    progress 为可选的回调，每完成一个方向调用一次，参数为描述进度的字典。
+    返回一个按 topics 顺序排列的字典: {方向名称: 论文列表}。
+    """
+    if not topics:
+        return {}
+
+    if settings.get('merge_queries'):
+        if progress:
+            progress({'phase': 'searching', 'completed_directions': 0, 'total_directions': len(topics)})
+        papers_by_direction = run_merged_search(topics, settings, max_workers)
+        if progress:
+            for completed, (direction, papers) in enumerate(papers_by_direction.items(), 1):
+                progress({'phase': 'searching', 'completed_directions': completed, 'total_directions': len(topics),
+                          'group': direction, 'new_papers': papers})
+        return papers_by_direction
+
+    if max_workers is None:
+        max_workers = settings.get('max_concurrent_directions', DEFAULT_MAX_CONCURRENT_DIRECTIONS)
+    max_workers = max(1, min(int(max_workers), len(topics)))
+
+    print(f"--- 使用 {max_workers} 个线程并发搜索 {len(topics)} 个方向 ---")
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(run_search, topic, settings) for topic in topics]
+        future_to_topic = dict(zip(futures, topics))
+        for completed, future in enumerate(as_completed(futures), 1):
+            if progress:
+                progress({'phase': 'searching', 'completed_directions': completed, 'total_directions': len(topics),
+                          'group': future_to_topic[future].get('direction', '未命名方向'), 'new_papers': future.result()})
+    finally:
+        # 正常结束时所有任务均已完成；若回调抛出异常 (例如任务被取消)，则不再启动排队中的方向
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    papers_by_direction = {}
+    for topic, future in zip(topics, futures):
+        papers_by_direction[topic.get('direction', '未命名方向')] = future.result()
+    return papers_by_direction
+
+
 if __name__ == "__main__":
     auto_git_pull()
     parser = argparse.ArgumentParser(description="从 arXiv 批量搜索指定时间窗口内的新论文并导出到 Excel。")
@@ -199,6 +549,9 @@ if __name__ == "__main__":
     parser.add_argument("--limit", type=int, help="覆盖配置文件中每个主题的论文数量上限。")
     parser.add_argument("--min-authors", type=int, help="覆盖配置文件中的最少作者数量。")
     parser.add_argument("--output", type=str, help="覆盖配置文件中的输出文件名。")
+    parser.add_argument("--merge-queries", action="store_true", help="将所有方向的查询合并为一次去重获取，再在本地分发到各方向。")
+    parser.add_argument("--incremental", action="store_true", help="增量模式：只获取上次运行之后更新的论文，并与本地论文库合并生成报告。")
+    parser.add_argument("--format", type=str, choices=list(EXPORT_FORMATS), help="导出格式，覆盖配置文件中的 output_format (默认 xlsx)。")
     args = parser.parse_args()
 
     total_start_time = time.time()
@@ -217,6 +570,10 @@ if __name__ == "__main__":
     search_window_days = args.days if args.days is not None else settings.get('search_window_days', 7)
     limit_per_topic = args.limit if args.limit is not None else settings.get('limit_per_topic', 100)
     min_authors = args.min_authors if args.min_authors is not None else settings.get('min_authors', 1)
+    if args.merge_queries:
+        settings['merge_queries'] = True
+    if args.incremental:
+        settings['incremental'] = True
     
     # 计算并格式化搜索的起止日期
     end_date = datetime.now(timezone.utc)
@@ -226,7 +583,8 @@ if __name__ == "__main__":
     end_date_str = end_date.strftime('%m%d')
     
     # 动态生成文件名
-    output_file = f"./outputs/arxiv_report_{start_date_str}_{end_date_str}.xlsx"
+    output_format = check_export_format(args.format or config.get('output_format', DEFAULT_EXPORT_FORMAT))
+    output_file = export_filename(f"./outputs/arxiv_report_{start_date_str}_{end_date_str}", output_format)
 
     print(f"将搜索在 {start_date.strftime('%Y-%m-%d')} 之后更新的论文...")
     print(f"结果将保存到文件: {output_file}")
@@ -235,65 +593,38 @@ if __name__ == "__main__":
     papers_by_direction = {}
     total_papers_found = 0
     
-    for topic in config.get('search_topics', []):
-        # 直接调用重构后的 run_search 函数
-        papers = run_search(topic, settings)
-        
+    # 并发执行所有方向的搜索
+    all_results = run_searches(config.get('search_topics', []), settings)
+    for direction, papers in all_results.items():
         if papers:
-            direction = topic.get('direction', '未命名方向')
             papers_by_direction[direction] = papers
             total_papers_found += len(papers)
-        
-        print("---")
+    print("---")
 
     
     print(f"\n--- 在过去 {search_window_days} 天内，共找到 {total_papers_found} 篇相关新论文 ---\n")
     if not papers_by_direction:
         print("所有方向均未找到符合所有筛选条件的论文。")
     else:
-        # 使用 ExcelWriter 将多个 DataFrame 写入不同的 sheet
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            
-            sorted_directions = sorted(papers_by_direction.keys())
-
-            for direction in sorted_directions:
-                papers = papers_by_direction[direction]
-                
-                # 在每个工作表内部按更新日期排序
-                papers.sort(key=lambda p: p['updated'], reverse=True)
-
-                print(f"方向 '{direction}' 找到 {len(papers)} 篇论文。")
-
-                df = pd.DataFrame(papers)
-                df_for_excel = pd.DataFrame({
-                    '更新日期': df['updated'],
-                    '发表日期': df['published'],
-                    '文章标题': df['title'],
-                    '匹配关键词': df['matched_keywords'],
-                    '作者': df['author'],
-                    'URL': df['url'],
-                    '摘要': df['summary'],
-                })
-                
-                # 清理工作表名称，移除不支持的字符
-                safe_sheet_name = "".join(c for c in direction if c.isalnum() or c in (' ', '_')).rstrip()
-                safe_sheet_name = safe_sheet_name[:31] # Excel 工作表名长度限制为31个字符
-                
-                df_for_excel.to_excel(writer, sheet_name=safe_sheet_name, index=False)
-                
-                # --- 新增：为每个工作表自动调整列宽 ---
-                worksheet = writer.sheets[safe_sheet_name]
-                for idx, col in enumerate(df_for_excel, 1):
-                    series = df_for_excel[col]
-                    try:
-                        max_len = max(
-                            series.astype(str).map(len).max(),
-                            len(str(series.name))
-                        ) + 4
-                    except (ValueError, TypeError):
-                        max_len = len(str(series.name)) + 4
-                    
-                    worksheet.column_dimensions[get_column_letter(idx)].width = max_len
+        columns = [
+            ('更新日期', 'updated'),
+            ('发表日期', 'published'),
+            ('文章标题', 'title'),
+            ('匹配关键词', 'matched_keywords'),
+            ('作者', 'author'),
+            ('URL', 'url'),
+            ('摘要', 'summary'),
+        ]
+        sheets = []
+        for direction in sorted(papers_by_direction.keys()):
+            papers = papers_by_direction[direction]
+
+            # 在每个工作表内部按更新日期排序
+            papers.sort(key=lambda p: p['updated'], reverse=True)
+
+            print(f"方向 '{direction}' 找到 {len(papers)} 篇论文。")
+            sheets.append((safe_sheet_name(direction), columns, papers))
+        write_report(output_file, sheets, fmt=output_format)
 
         print(f"\n结果已成功导出到 {output_file}，每个研究方向对应一个工作表。")
 
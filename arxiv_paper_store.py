@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+
+from response_cache import CACHE_DIR
+
+DEFAULT_STORE_PATH = os.path.join(CACHE_DIR, 'arxiv_store.sqlite')
+
+_ARXIV_VERSION_RE = re.compile(r'v\d+$')
+
+# 同一篇论文 (不含版本号的 ID) 只保留更新时间最新的版本
+_UPSERT_ENTRY_SQL = """
+    INSERT INTO entries (query_key, paper_id, entry_id, updated, payload) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (query_key, paper_id) DO UPDATE SET
+        entry_id = excluded.entry_id, updated = excluded.updated, payload = excluded.payload
+    WHERE excluded.updated >= entries.updated
+"""
+
+
+def _base_entry_id(entry_id):
+    """去掉 entry_id (例如 http://arxiv.org/abs/2401.00001v2) 末尾的版本号。"""
+    return _ARXIV_VERSION_RE.sub('', entry_id)
+
+
+class ArxivPaperStore:
+    """
+    增量时间窗口模式使用的本地论文库。
+    按查询保存已经获取过的 arXiv 论文条目 (见 arxiv_multi_search._project_result)，
+    以及该查询见过的最新 `updated` 时间 (高水位线)。
+    每次运行只需获取高水位线之后的新论文，再与库中仍在时间窗口内的论文合并。
+    论文按不含版本号的 ID 保存，论文更新 (新版本) 后只保留最新的版本。
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        migrate = bool(columns) and 'paper_id' not in columns
+        if migrate:
+            # 旧版本按带版本号的 entry_id 保存，同一篇论文的多个版本会同时出现
+            self._conn.execute("ALTER TABLE entries RENAME TO entries_old")
+            self._conn.execute("DROP INDEX IF EXISTS idx_entries_updated")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks (
+                query_key TEXT PRIMARY KEY,
+                high_water TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS entries (
+                query_key TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                entry_id TEXT NOT NULL,
+                updated TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (query_key, paper_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_updated ON entries (query_key, updated);
+            """
+        )
+        if migrate:
+            rows = self._conn.execute("SELECT query_key, entry_id, updated, payload FROM entries_old").fetchall()
+            self._conn.executemany(
+                _UPSERT_ENTRY_SQL,
+                [(query_key, _base_entry_id(entry_id), entry_id, updated, payload)
+                 for query_key, entry_id, updated, payload in rows],
+            )
+            self._conn.execute("DROP TABLE entries_old")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(query):
+        """根据查询字符串生成存储键；查询变化时会自动使用新的高水位线。"""
+        return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+    def get_high_water(self, query_key):
+        """返回该查询见过的最新更新时间，从未运行过时返回 None。"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT high_water FROM watermarks WHERE query_key = ?", (query_key,)
+            ).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def add_entries(self, query_key, entries, truncated=False):
+        """
+        写入新获取的论文条目 (同一篇论文已存在时只保留更新时间最新的版本)，并推进高水位线。
+        entries 中的 published/updated 字段为 datetime 对象。
+        truncated 为 True 表示本次获取达到了数量上限，原高水位线与最旧条目之间可能有论文没有获取，
+        此时只写入条目、不推进高水位线，下次运行仍从原高水位线开始获取。
+        """
+        if not entries:
+            return
+        newest = max(entry['updated'] for entry in entries)
+        rows = [
+            (
+                query_key,
+                _base_entry_id(entry['entry_id']),
+                entry['entry_id'],
+                entry['updated'].isoformat(),
+                json.dumps(dict(entry, published=entry['published'].isoformat(), updated=entry['updated'].isoformat()), ensure_ascii=False),
+            )
+            for entry in entries
+        ]
+        with self._lock:
+            self._conn.executemany(_UPSERT_ENTRY_SQL, rows)
+            row = self._conn.execute(
+                "SELECT high_water FROM watermarks WHERE query_key = ?", (query_key,)
+            ).fetchone()
+            if not truncated and (row is None or datetime.fromisoformat(row[0]) < newest):
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO watermarks (query_key, high_water) VALUES (?, ?)",
+                    (query_key, newest.isoformat()),
+                )
+            self._conn.commit()
+
+    def load_entries(self, query_key, since, limit=None):
+        """按更新时间倒序返回 since 之后的条目 (最多 limit 条)，并清理已滑出时间窗口的旧条目。"""
+        with self._lock:
+            # 所有时间戳都是同一时区 (UTC) 的 ISO 格式字符串，可以直接按字符串比较
+            self._conn.execute(
+                "DELETE FROM entries WHERE query_key = ? AND updated < ?", (query_key, since.isoformat())
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT payload FROM entries WHERE query_key = ? ORDER BY updated DESC LIMIT ?",
+                (query_key, limit or -1),
+            ).fetchall()
+
+        entries = []
+        for (payload,) in rows:
+            entry = json.loads(payload)
+            entry['published'] = datetime.fromisoformat(entry['published'])
+            entry['updated'] = datetime.fromisoformat(entry['updated'])
+            entries.append(entry)
+        return entries
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_paper_store():
+    """返回进程内共享的增量模式论文库（首次调用时创建）。"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = ArxivPaperStore()
+        return _shared_store
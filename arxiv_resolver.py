@@ -0,0 +1,125 @@
+import re
+
+import arxiv
+
+from arxiv_multi_search import get_arxiv_client
+from title_matcher import TitleMatcher
+
+# 每次 arXiv 查询中合并的标题数量 (受请求 URL 长度限制)
+RESOLVE_BATCH_SIZE = 20
+# 每个标题在查询结果中分到的候选数量
+RESULTS_PER_TITLE = 3
+
+
+def arxiv_pdf_url(arxiv_id):
+    """由 arXiv ID 构造 PDF 下载链接。"""
+    return f"https://arxiv.org/pdf/{arxiv_id}"
+
+
+def _phrase(title):
+    """把标题转换为可以放进 ti:"..." 短语查询中的形式 (去掉引号、括号等会破坏查询语法的字符)。"""
+    return re.sub(r'\s+', ' ', re.sub(r'[^\w\s-]', ' ', title)).strip()
+
+
+def _first_author_surname(paper):
+    author = (paper.get('author') or paper.get('作者', '')).split(',')[0].strip()
+    return author.split()[-1].lower() if author else ''
+
+
+def _best_match(paper, candidates, matcher):
+    """
+    在一批 arXiv 结果中为论文挑选标题最相似的一篇，要求相似度达到阈值 (见 title_matcher)；
+    论文带有作者信息时，只考虑作者中包含其第一作者姓氏的候选结果。
+    """
+    surname = _first_author_surname(paper)
+    indices = None
+    if surname:
+        indices = [i for i, c in enumerate(candidates) if any(surname in name.lower() for name in c['authors'])]
+    match = matcher.match(paper.get('title'), indices=indices)
+    return candidates[match[0]] if match else None
+
+
+def _title_clause(paper, title):
+    """单篇论文的查询子句：标题短语，论文带有作者信息时同时限定第一作者姓氏 (与逐篇查询时相同)。"""
+    surname = _phrase(_first_author_surname(paper))
+    clause = f'ti:"{title}"'
+    return f'({clause} AND au:"{surname}")' if surname else clause
+
+
+def _search_candidates(query, max_results, client):
+    search = arxiv.Search(query=query, max_results=max_results)
+    return [
+        {'title': result.title, 'authors': [author.name for author in result.authors], 'arxiv_id': result.get_short_id()}
+        for result in client.results(search)
+    ]
+
+
+def _match_candidates(papers, candidates):
+    """为每篇论文在候选结果中挑选匹配的 arXiv ID，返回与 papers 对齐的列表 (未匹配为 None)。"""
+    # 候选标题只归一化一次，批内所有论文共用
+    matcher = TitleMatcher([c['title'] for c in candidates])
+    resolved = []
+    for paper in papers:
+        match = _best_match(paper, candidates, matcher)
+        resolved.append(match['arxiv_id'] if match else None)
+    return resolved
+
+
+def _resolve_batch(papers, titles, client):
+    """
+    用一次 OR 合并的查询解析一批论文，返回与 papers 对齐的 arXiv ID 列表 (未解析为 None)。
+    合并查询的结果按相关度排序并共享 len(titles) * RESULTS_PER_TITLE 条的上限，
+    达到上限时宽泛的标题可能占满全部结果，因此仍未解析的论文再逐篇查询一次，结果不会比逐篇查询差。
+    """
+    max_results = len(titles) * RESULTS_PER_TITLE
+    query = ' OR '.join(_title_clause(paper, title) for paper, title in zip(papers, titles))
+    candidates = _search_candidates(query, max_results, client)
+    resolved = _match_candidates(papers, candidates)
+    if len(titles) == 1 or len(candidates) < max_results:
+        # 结果没有达到上限，说明每个子句的结果都已全部返回
+        return resolved
+
+    for i, (paper, title) in enumerate(zip(papers, titles)):
+        if resolved[i] is not None:
+            continue
+        try:
+            candidates = _search_candidates(_title_clause(paper, title), RESULTS_PER_TITLE, client)
+        except Exception as e:
+            print(f"  ! 查询 arXiv 论文 '{title}' 时出错: {e}")
+            continue
+        resolved[i] = _match_candidates([paper], candidates)[0]
+    return resolved
+
+
+def resolve_arxiv_ids(papers, client=None, batch_size=RESOLVE_BATCH_SIZE):
+    """
+    为没有 arXiv ID 的论文 (例如 Semantic Scholar 结果) 批量查找对应的 arXiv 论文。
+    第一轮按完整标题 (和第一作者姓氏) 查询，每批 batch_size 篇论文发出一次 OR 合并的请求，
+    合并查询的结果达到上限时，对批内仍未解析的论文逐篇补查；
+    第二轮对仍未解析、且标题含冒号的论文改用冒号前的主标题再查一次。
+    返回与 papers 对齐的 arXiv ID 列表，无法解析的位置为 None。单批查询出错时该批视为未解析。
+    """
+    client = client or get_arxiv_client()
+    resolved = [None] * len(papers)
+
+    def run_pass(indices, title_of):
+        for start in range(0, len(indices), batch_size):
+            batch = indices[start:start + batch_size]
+            titles = [title_of(papers[i]) for i in batch]
+            try:
+                ids = _resolve_batch([papers[i] for i in batch], titles, client)
+            except Exception as e:
+                print(f"  ! 批量解析 arXiv ID 时出错: {e}")
+                continue
+            for i, arxiv_id in zip(batch, ids):
+                resolved[i] = arxiv_id
+
+    pending = [i for i, paper in enumerate(papers) if _phrase(paper.get('title') or '')]
+    run_pass(pending, lambda paper: _phrase(paper['title']))
+
+    pending = [i for i in pending if resolved[i] is None and ':' in papers[i]['title']
+               and _phrase(papers[i]['title'].split(':')[0])]
+    run_pass(pending, lambda paper: _phrase(paper['title'].split(':')[0]))
+
+    print(f"  > 批量解析 arXiv ID: {sum(1 for i in resolved if i)} / {len(papers)} 篇论文找到对应的 arXiv 版本")
+    return resolved
@@ -0,0 +1,107 @@
+"""
+对比原先基于 pandas DataFrame + openpyxl 普通模式的 Excel 导出与 report_export (只写模式) 的
+耗时和内存峰值 (tracemalloc)。未安装 pandas 时只测试 report_export。
+
+用法: python benchmarks/bench_excel_export.py [--papers 20000] [--sheets 4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_export import excel_report_bytes, safe_sheet_name  # noqa: E402
+
+WORDS = ("efficient sparse attention accelerator transformer quantization hardware design "
+         "neural network inference training memory bandwidth systolic array dataflow "
+         "low power edge devices large language models compression pruning mixed precision").split()
+
+COLUMNS = [
+    ('更新日期', 'updated'),
+    ('发表日期', 'published'),
+    ('文章标题', 'title'),
+    ('匹配关键词', 'matched_keywords'),
+    ('作者', 'author'),
+    ('URL', 'url'),
+    ('摘要', 'summary'),
+]
+
+
+def make_papers(count, rng):
+    papers = []
+    for i in range(count):
+        papers.append({
+            'updated': f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'published': f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'title': ' '.join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize(),
+            'matched_keywords': ', '.join(rng.sample(WORDS, 2)),
+            'author': ', '.join(f"Author {rng.randint(1, 5000)}" for _ in range(rng.randint(1, 8))),
+            'url': f"http://arxiv.org/abs/2501.{i:05d}v1",
+            # 完整摘要占导出内容的大部分
+            'summary': ' '.join(rng.choices(WORDS, k=rng.randint(150, 250))),
+        })
+    return papers
+
+
+def export_with_pandas(groups):
+    """原先 CLI 中的导出方式：每组构建 DataFrame，写入后再用 astype(str) 计算列宽。"""
+    import pandas as pd
+    from openpyxl.utils import get_column_letter
+
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='openpyxl') as writer:
+        for name, papers in groups.items():
+            df = pd.DataFrame(papers)
+            df_for_excel = pd.DataFrame({header: df[key] for header, key in COLUMNS})
+            df_for_excel.to_excel(writer, sheet_name=name, index=False)
+            worksheet = writer.sheets[name]
+            for idx, col in enumerate(df_for_excel, 1):
+                series = df_for_excel[col]
+                max_len = max(series.astype(str).map(len).max(), len(str(series.name))) + 4
+                worksheet.column_dimensions[get_column_letter(idx)].width = max_len
+    return output
+
+
+def export_streaming(groups):
+    return excel_report_bytes((safe_sheet_name(name), COLUMNS, papers) for name, papers in groups.items())
+
+
+def measure(label, func, groups):
+    tracemalloc.start()
+    start = time.perf_counter()
+    output = func(groups)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = len(output.getvalue())
+    print(f"{label:<12} 耗时 {elapsed:7.2f}s  内存峰值 {peak / 1024 / 1024:8.1f} MB  文件大小 {size / 1024 / 1024:6.1f} MB")
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Excel 导出基准测试")
+    parser.add_argument("--papers", type=int, default=20000, help="论文总数")
+    parser.add_argument("--sheets", type=int, default=4, help="工作表数量")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    papers = make_papers(args.papers, rng)
+    groups = {f"Direction {i}": papers[i::args.sheets] for i in range(args.sheets)}
+    print(f"导出 {args.papers} 篇论文，{args.sheets} 个工作表")
+
+    streaming = measure('report_export', export_streaming, groups)
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("未安装 pandas，跳过原先的导出方式。")
+        return
+    baseline = measure('pandas', export_with_pandas, groups)
+    print(f"耗时降低 {baseline[0] / streaming[0]:.1f} 倍，内存峰值降低 {baseline[1] / streaming[1]:.1f} 倍")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+对比 report_export 支持的各导出格式 (xlsx / csv.gz / jsonl / parquet) 的导出耗时和文件大小。
+论文数据与 bench_excel_export.py 相同；未安装 pyarrow 时跳过 Parquet。
+
+用法: python benchmarks/bench_export_formats.py [--papers 20000] [--sheets 4]
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_excel_export import COLUMNS, make_papers  # noqa: E402
+from report_export import available_export_formats, write_report  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出格式基准测试")
+    parser.add_argument("--papers", type=int, default=20000, help="论文总数")
+    parser.add_argument("--sheets", type=int, default=4, help="工作表 (分组) 数量")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    papers = make_papers(args.papers, rng)
+    sheets = [(f"Direction {i}", COLUMNS, papers[i::args.sheets]) for i in range(args.sheets)]
+    print(f"导出 {args.papers} 篇论文，{args.sheets} 个分组")
+
+    results = {}
+    for fmt in available_export_formats():
+        output = io.BytesIO()
+        start = time.perf_counter()
+        write_report(output, sheets, fmt=fmt)
+        elapsed = time.perf_counter() - start
+        results[fmt] = (elapsed, len(output.getvalue()))
+
+    base_time, base_size = results['xlsx']
+    for fmt, (elapsed, size) in results.items():
+        print(f"{fmt:<8} 耗时 {elapsed:7.2f}s ({base_time / elapsed:5.1f}x)  "
+              f"文件大小 {size / 1024 / 1024:6.1f} MB ({size / base_size:5.0%} of xlsx)")
+    if 'parquet' not in results:
+        print("未安装 pyarrow，跳过 Parquet。")
+
+
+if __name__ == '__main__':
+    main()
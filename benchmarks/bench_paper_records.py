@@ -0,0 +1,130 @@
+"""
+对比 Semantic Scholar 搜索结果在内存中的两种表示方式的内存占用 (tracemalloc)：
+
+- dict：原先的方式，搜索结果投影为字典 (搜索缓存保留全部结果)，通过筛选的论文再生成输出字典，
+  app.py 返回前端前又复制为格式化的字典；
+- record：paper_record 中的 __slots__ 记录，投影和输出各一个紧凑记录，序列化时才临时生成字典。
+
+论文数据为随机生成的 semanticscholar Paper 对象，逐篇生成并在投影后丢弃。
+用法: python benchmarks/bench_paper_records.py [--papers 50000] [--kept 0.5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from semanticscholar.Paper import Paper  # noqa: E402
+
+from paper_record import SemanticScholarRecord, json_default  # noqa: E402
+from semantic_scholar_search import _project_paper  # noqa: E402
+
+WORDS = ("efficient sparse attention accelerator transformer quantization hardware design "
+         "neural network inference training memory bandwidth systolic array dataflow "
+         "low power edge devices large language models compression pruning mixed precision").split()
+
+
+def iter_api_papers(count, seed=0):
+    """逐篇生成模拟的 API 响应 (Paper 对象)。"""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield Paper({
+            'paperId': f"{i:040x}",
+            'title': ' '.join(rng.choices(WORDS, k=rng.randint(6, 14))).capitalize(),
+            'venue': 'International Symposium on Computer Architecture',
+            'year': rng.randint(2015, 2025),
+            'authors': [{'authorId': str(rng.randint(1, 10 ** 8)), 'name': f"Author {rng.randint(1, 5000)}"}
+                        for _ in range(rng.randint(1, 8))],
+            'citationCount': rng.randint(0, 500),
+            'abstract': ' '.join(rng.choices(WORDS, k=rng.randint(150, 250))),
+            'url': f"https://www.semanticscholar.org/paper/{i:040x}",
+            'externalIds': {'DOI': f"10.1145/{i}", 'ArXiv': f"2501.{i % 100000:05d}"},
+        })
+
+
+def project_to_dict(paper):
+    """原先的投影方式 (字典)。"""
+    external_ids = paper.externalIds or {}
+    return {
+        'paperId': paper.paperId, 'title': paper.title, 'venue': paper.venue, 'year': paper.year,
+        'authors': [author['name'] for author in paper.authors], 'citationCount': paper.citationCount,
+        'abstract': paper.abstract, 'url': paper.url,
+        'arxiv_id': external_ids.get('ArXiv'), 'doi': external_ids.get('DOI'),
+    }
+
+
+def output_fields(paper):
+    return dict(
+        title=paper['title'], matched_keywords='sparse, accelerator', venue_name='ISCA', category='Architecture',
+        year=paper['year'], url=paper['url'], author=", ".join(paper['authors']), citations=paper['citationCount'],
+        paperId=paper['paperId'], arxiv_id=paper['arxiv_id'], doi=paper['doi'],
+    )
+
+
+FORMATTED_KEYS = ('title', 'author', 'year', 'venue_name', 'category', 'url', 'citations', 'arxiv_id', 'doi')
+
+
+def run_dicts(count, kept_ratio):
+    fetched, outputs, formatted = [], [], []
+    for i, api_paper in enumerate(iter_api_papers(count)):
+        paper = project_to_dict(api_paper)
+        fetched.append(paper)
+        if i % round(1 / kept_ratio) == 0:
+            output = output_fields(paper)
+            outputs.append(output)
+            # app.py 返回前端前复制的格式化字典 (原始输出字典同样保留到搜索结束)
+            formatted_paper = {key: output[key] for key in FORMATTED_KEYS}
+            formatted_paper['matched_keywords'] = output['matched_keywords']
+            formatted.append(formatted_paper)
+    return fetched, outputs, formatted
+
+
+def run_records(count, kept_ratio):
+    fetched, records = [], []
+    for i, api_paper in enumerate(iter_api_papers(count)):
+        paper = _project_paper(api_paper)
+        fetched.append(paper)
+        if i % round(1 / kept_ratio) == 0:
+            records.append(SemanticScholarRecord(**output_fields(paper)))
+    return fetched, records
+
+
+def measure(label, func, count, kept_ratio):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(count, kept_ratio)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    # 释放获取阶段的投影结果 (含摘要，两种方式相同的字符串占大部分)，剩余的即通过筛选的输出结果
+    result[0].clear()
+    output_retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<8} 耗时 {elapsed:6.2f}s  保留内存 {retained / 1024 / 1024:7.1f} MB  峰值 {peak / 1024 / 1024:7.1f} MB  "
+          f"其中输出结果 {output_retained / 1024 / 1024:6.1f} MB")
+    return result, retained, output_retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description="论文记录内存占用基准测试")
+    parser.add_argument("--papers", type=int, default=50000, help="获取的论文数量")
+    parser.add_argument("--kept", type=float, default=0.5, help="通过筛选的论文比例")
+    args = parser.parse_args()
+    print(f"获取 {args.papers} 篇论文，其中约 {args.kept:.0%} 通过筛选")
+
+    old_result, old_retained, old_output = measure('dict', run_dicts, args.papers, args.kept)
+    new_result, new_retained, new_output = measure('record', run_records, args.papers, args.kept)
+    print(f"保留内存降低 {old_retained / new_retained:.2f} 倍，其中输出结果降低 {old_output / new_output:.2f} 倍")
+
+    # 两种方式返回前端的 JSON 相同 (论文记录额外包含 paperId)
+    old_json = json.dumps(old_result[2], sort_keys=True)
+    new_json = json.dumps([{key: value for key, value in json_default(record).items() if key != 'paperId'}
+                           for record in new_result[1]], sort_keys=True)
+    assert old_json == new_json, "两种方式序列化的结果不一致"
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+对比下载回退路径中原先的 difflib.SequenceMatcher 标题比较与 title_matcher (rapidfuzz) 的速度，
+并统计两者在 0.8 / 80 阈值下判断结果的一致率。
+
+用法: python benchmarks/bench_title_matcher.py [--pairs 5000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import fuzz  # noqa: E402
+
+from title_matcher import TITLE_SCORE_CUTOFF, TitleMatcher, normalize_title  # noqa: E402
+
+WORDS = ("efficient sparse attention accelerator transformer quantization hardware design "
+         "neural network inference training memory bandwidth systolic array dataflow "
+         "low power edge devices large language models compression pruning mixed precision "
+         "in-memory computing architecture scalable graph processing vision benchmark").split()
+
+
+def make_title(rng):
+    words = rng.sample(WORDS, rng.randint(6, 14))
+    title = ' '.join(words).capitalize()
+    if rng.random() < 0.4:
+        title = f"{rng.choice(['FlashX', 'SpAtten', 'Eyeriss', 'TPU-Lite'])}: {title}"
+    return title
+
+
+def perturb(title, rng):
+    """模拟不同来源之间的标题差异：大小写、标点、LaTeX、增删词，或者完全不同的论文。"""
+    choice = rng.random()
+    if choice < 0.25:
+        return title.upper()
+    if choice < 0.45:
+        return title.replace(' ', ' \\textit{', 1) + '}' if ' ' in title else title
+    if choice < 0.65:
+        words = title.split()
+        del words[rng.randrange(len(words))]
+        return ' '.join(words) + '.'
+    if choice < 0.8:
+        return title.split(':')[0] if ':' in title else title + ' extended version'
+    return make_title(rng)
+
+
+def old_match(a, b):
+    """下载回退路径中原先的判断方式。"""
+    return SequenceMatcher(None, a.lower(), b.lower()).ratio() >= 0.8
+
+
+def new_match(a, b):
+    """title_matcher 的判断方式：归一化后的 rapidfuzz 相似度达到阈值。"""
+    return fuzz.ratio(normalize_title(a), normalize_title(b)) >= TITLE_SCORE_CUTOFF
+
+
+def main():
+    parser = argparse.ArgumentParser(description="标题匹配微基准测试")
+    parser.add_argument("--pairs", type=int, default=5000, help="标题对数量")
+    parser.add_argument("--candidates", type=int, default=60, help="批量匹配时每批的候选数量")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    pairs = []
+    for _ in range(args.pairs):
+        title = make_title(rng)
+        pairs.append((title, perturb(title, rng)))
+
+    start = time.perf_counter()
+    old_results = [old_match(a, b) for a, b in pairs]
+    old_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results = [new_match(a, b) for a, b in pairs]
+    new_time = time.perf_counter() - start
+
+    agree = sum(1 for o, n in zip(old_results, new_results) if o == n)
+    print(f"{args.pairs} 个标题对，SequenceMatcher 判定匹配 {sum(old_results)} 对，rapidfuzz 判定匹配 {sum(new_results)} 对，"
+          f"一致率 {agree / args.pairs:.1%}")
+    print(f"SequenceMatcher 逐对比较: {old_time:.3f} 秒")
+    print(f"rapidfuzz 逐对比较:       {new_time:.3f} 秒 (加速 {old_time / new_time:.1f}x)")
+
+    # 批量场景：每个查询标题与一批候选比较 (对应 arXiv 批量解析中的一批结果)
+    queries = [a for a, _ in pairs[:args.pairs // 10]]
+    candidates = [b for _, b in pairs[:args.candidates]]
+
+    start = time.perf_counter()
+    for query in queries:
+        best = max(candidates, key=lambda c: SequenceMatcher(None, query.lower(), c.lower()).ratio())
+        SequenceMatcher(None, query.lower(), best.lower()).ratio() >= 0.8
+    old_batch_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = TitleMatcher(candidates)
+    for query in queries:
+        matcher.match(query)
+    new_batch_time = time.perf_counter() - start
+
+    print(f"{len(queries)} 个查询 x {len(candidates)} 个候选:")
+    print(f"SequenceMatcher 逐一比较:       {old_batch_time:.3f} 秒")
+    print(f"TitleMatcher (extractOne):      {new_batch_time:.3f} 秒 (加速 {old_batch_time / new_batch_time:.1f}x)")
+    print(f"示例归一化: {pairs[1][1]!r} -> {normalize_title(pairs[1][1])!r}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+对比 find_top_venue 的旧实现 (逐一子串扫描) 与 VenueIndex 的速度，并校验两者结果一致。
+
+用法: python benchmarks/bench_venue_index.py [--count 100000]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from venue_index import VenueIndex  # noqa: E402
+
+
+def linear_find_top_venue(venue_str, venue_definitions):
+    """旧版 find_top_venue：每篇论文都重新构建列表并逐一做子串检查。"""
+    if not venue_str or not venue_definitions:
+        return None, None
+
+    venue_lower = venue_str.lower()
+    venue_lower = venue_lower.replace(",", "")
+
+    all_venues_to_check = []
+    if 'venues' in venue_definitions and isinstance(venue_definitions['venues'], dict):
+        all_venues_to_check.extend(venue_definitions['venues'].items())
+
+    for key, value in venue_definitions.items():
+        if key != 'venues' and isinstance(value, dict) and 'venue' in value:
+            all_venues_to_check.append((key, value))
+
+    for conf_name, conf_details in all_venues_to_check:
+        for pattern in conf_details.get('venue', []):
+            if pattern.lower() in venue_lower:
+                return conf_name, conf_details.get('category', 'Others')
+
+    return None, None
+
+
+def make_venue_strings(venue_definitions, count, unique, seed=0):
+    """生成模拟的 venue 字符串：一部分来自真实模式 (带前后缀)，一部分为无关会议。"""
+    rng = random.Random(seed)
+    patterns = [p for _, details in venue_definitions.get('venues', {}).items() for p in details.get('venue', [])]
+    noise = ['Journal of Applied Physics', 'Nature', 'Proceedings of the ACM on Networking',
+             'International Conference on Robotics', 'Sensors', 'IEEE Access']
+    pool = []
+    for i in range(unique):
+        if rng.random() < 0.5:
+            base = rng.choice(patterns)
+            pool.append(f"{rng.choice(['', 'Proceedings of the ', '2024 IEEE '])}{base}{rng.choice(['', f' ({i})', ', 2023'])}")
+        else:
+            pool.append(f"{rng.choice(noise)} {i}")
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="find_top_venue 微基准测试")
+    parser.add_argument("--count", type=int, default=100000, help="venue 字符串数量")
+    parser.add_argument("--unique", type=int, default=5000, help="其中不重复的 venue 字符串数量")
+    parser.add_argument("--venues", type=str, default="configs/semantic_scholar_default.json")
+    args = parser.parse_args()
+
+    with open(args.venues, 'r', encoding='utf-8') as f:
+        venue_definitions = json.load(f)
+    venue_strings = make_venue_strings(venue_definitions, args.count, args.unique)
+
+    start = time.perf_counter()
+    expected = [linear_find_top_venue(v, venue_definitions) for v in venue_strings]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index = VenueIndex(venue_definitions)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = [index.lookup(v) for v in venue_strings]
+    indexed_time = time.perf_counter() - start
+
+    # 关闭记忆化，单独衡量索引本身的扫描速度
+    start = time.perf_counter()
+    unmemoized = [index._resolve(v) for v in venue_strings]
+    unmemoized_time = time.perf_counter() - start
+
+    assert actual == expected == unmemoized, "VenueIndex 的结果与旧实现不一致"
+    matched = sum(1 for name, _ in expected if name)
+    print(f"{args.count} 个 venue 字符串 ({args.unique} 个不重复)，其中 {matched} 个命中，结果一致")
+    print(f"旧实现 (逐一子串扫描): {linear_time:.3f} 秒")
+    print(f"VenueIndex 构建:       {build_time * 1000:.1f} 毫秒")
+    print(f"VenueIndex (无记忆化): {unmemoized_time:.3f} 秒 (加速 {linear_time / unmemoized_time:.1f}x)")
+    print(f"VenueIndex (记忆化):   {indexed_time:.3f} 秒 (加速 {linear_time / indexed_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
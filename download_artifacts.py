@@ -0,0 +1,155 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zipfile
+
+from response_cache import CACHE_DIR
+
+DEFAULT_ARTIFACT_DIR = os.path.join(CACHE_DIR, 'downloads')
+# 打包好的下载文件保留时间 (秒)
+DEFAULT_ARTIFACT_TTL = 24 * 60 * 60
+# 所有下载文件占用空间上限 (字节)，超出时优先删除最早创建的文件
+DEFAULT_ARTIFACT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+_ARTIFACT_ID_RE = re.compile(r'^[0-9a-f-]{36}$')
+
+
+class DownloadArtifactStore:
+    """
+    保存下载任务生成的 ZIP 文件的本地目录。
+    每个文件以 <artifact_id>.zip 保存，旁边的 <artifact_id>.json 记录下载文件名、创建时间和统计信息，
+    因此服务重启后仍然可以下载已经完成的文件。文件超过保留时间或总大小超过上限时会被清理。
+    """
+
+    def __init__(self, root=DEFAULT_ARTIFACT_DIR, ttl=DEFAULT_ARTIFACT_TTL, max_bytes=DEFAULT_ARTIFACT_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, artifact_id):
+        if not artifact_id or not _ARTIFACT_ID_RE.match(artifact_id):
+            raise ValueError(f"无效的文件 ID: {artifact_id}")
+        base = os.path.join(self.root, artifact_id)
+        return base + '.zip', base + '.json'
+
+    def staging_path(self, artifact_id):
+        """返回打包时使用的临时 ZIP 路径，位于存储目录内以便完成后直接改名。"""
+        self._paths(artifact_id)
+        return os.path.join(self.root, f".{artifact_id}.partial.zip")
+
+    def add(self, artifact_id, zip_path, filename, **meta):
+        """把打包好的 ZIP 文件移入存储目录并写入元数据，返回元数据字典。"""
+        target_zip, target_meta = self._paths(artifact_id)
+        os.replace(zip_path, target_zip)
+        metadata = dict(meta, artifact_id=artifact_id, filename=filename,
+                        created_at=time.time(), size=os.path.getsize(target_zip))
+        tmp_meta = target_meta + '.tmp'
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        # 元数据最后写入，保证能读到元数据时 ZIP 文件一定已经完整
+        os.replace(tmp_meta, target_meta)
+        self.prune()
+        return metadata
+
+    def get(self, artifact_id):
+        """返回文件的元数据 (含 path)，文件不存在或已过期时返回 None。"""
+        try:
+            zip_path, meta_path = self._paths(artifact_id)
+        except ValueError:
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - metadata.get('created_at', 0) > self.ttl or not os.path.exists(zip_path):
+            self.delete(artifact_id)
+            return None
+        metadata['path'] = zip_path
+        return metadata
+
+    def delete(self, artifact_id):
+        zip_path, meta_path = self._paths(artifact_id)
+        for path in (meta_path, zip_path):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def prune(self):
+        """删除过期的文件、残留的临时文件，并在总大小超过上限时按创建时间从旧到新删除。"""
+        now = time.time()
+        with self._lock:
+            artifacts = []
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.startswith('.'):
+                    # 中断的打包会留下临时文件，超过保留时间后清理
+                    if now - os.path.getmtime(path) > self.ttl:
+                        if os.path.isdir(path):
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            os.remove(path)
+                    continue
+                if not name.endswith('.json'):
+                    continue
+                artifact_id = name[:-len('.json')]
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        metadata = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                artifacts.append((metadata.get('created_at', 0), metadata.get('size', 0), artifact_id))
+
+            artifacts.sort()
+            total = sum(size for _, size, _ in artifacts)
+            for created_at, size, artifact_id in artifacts:
+                if now - created_at > self.ttl or total > self.max_bytes:
+                    self.delete(artifact_id)
+                    total -= size
+
+            # 没有元数据的 ZIP 文件 (例如写入元数据前进程退出) 同样在超过保留时间后清理
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if name.endswith('.zip') and not os.path.exists(path[:-len('.zip')] + '.json') \
+                        and now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+
+
+def write_download_zip(zip_path, directory, extra_files=None):
+    """
+    把 directory 下的所有文件，以及 extra_files ({压缩包内路径: 本地文件路径}) 打包为 zip_path。
+    extra_files 用于直接从 PDF 存储读取论文，无需先复制到下载目录。PDF 本身已经压缩，因此不再重复压缩。
+    """
+    with zipfile.ZipFile(zip_path, 'w') as zf:
+        for dirpath, _, filenames in os.walk(directory):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                arcname = os.path.relpath(path, directory)
+                compress = zipfile.ZIP_STORED if name.lower().endswith('.pdf') else zipfile.ZIP_DEFLATED
+                zf.write(path, arcname, compress_type=compress)
+        for arcname, path in (extra_files or {}).items():
+            try:
+                zf.write(path, arcname, compress_type=zipfile.ZIP_STORED)
+            except FileNotFoundError:
+                # 打包前该文件恰好被 PDF 存储淘汰
+                print(f"  ! 打包时找不到文件 '{path}'，已跳过 '{arcname}'")
+    return zip_path
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_artifact_store():
+    """返回进程内共享的下载文件存储（首次调用时创建）。"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = DownloadArtifactStore()
+        return _shared_store
@@ -0,0 +1,127 @@
+import os
+import tempfile
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# 下载线程数上限，连接池按此大小配置，保证每个线程都能复用一个连接
+DOWNLOAD_POOL_SIZE = 16
+# 对暂时性错误的重试次数与退避系数 (第 n 次重试前等待 backoff * 2^(n-1) 秒，响应带 Retry-After 时以其为准)
+DOWNLOAD_RETRIES = 4
+DOWNLOAD_BACKOFF = 1.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# (连接超时, 读取超时) 秒
+DOWNLOAD_TIMEOUT = (10, 60)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class HttpStats:
+    """线程安全的下载统计：请求数、失败数、下载字节数，以及按主机统计的响应延迟。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.bytes = 0
+        self._hosts = {}
+
+    def record(self, host, latency, nbytes=0, failed=False):
+        with self._lock:
+            self.requests += 1
+            self.bytes += nbytes
+            if failed:
+                self.failures += 1
+            stats = self._hosts.setdefault(host, {'requests': 0, 'total_latency': 0.0, 'max_latency': 0.0, 'bytes': 0})
+            stats['requests'] += 1
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+            stats['bytes'] += nbytes
+
+    def snapshot(self):
+        """返回当前统计的副本，每个主机额外给出平均延迟 (秒)。"""
+        with self._lock:
+            hosts = {
+                host: dict(stats, avg_latency=stats['total_latency'] / stats['requests'])
+                for host, stats in self._hosts.items()
+            }
+            return {'requests': self.requests, 'failures': self.failures, 'bytes': self.bytes, 'hosts': hosts}
+
+
+def build_session(pool_size=DOWNLOAD_POOL_SIZE, retries=DOWNLOAD_RETRIES, backoff=DOWNLOAD_BACKOFF):
+    """创建带连接池和重试策略的 requests.Session。"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        # 重试耗尽后返回最后一次响应，由 raise_for_status 报告具体的状态码
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def download_to_file(url, filepath, session=None, stats=None, timeout=DOWNLOAD_TIMEOUT):
+    """
+    通过共享的连接池下载 url 到 filepath，返回写入的字节数。
+    先写入同一目录下唯一命名的临时文件，完整下载后再改名，失败时不会留下不完整的文件，
+    多个线程同时下载到同一路径也不会互相覆盖临时文件；失败时抛出 requests 的异常。
+    """
+    session = session or get_download_session()
+    stats = stats or get_http_stats()
+    host = urlparse(url).netloc
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath) or '.', suffix='.part')
+    nbytes = 0
+    start = time.perf_counter()
+    latency = None
+    try:
+        with session.get(url, stream=True, timeout=timeout) as response:
+            # 延迟按收到响应头 (包括重试等待) 的时间计算
+            latency = time.perf_counter() - start
+            response.raise_for_status()
+            with os.fdopen(fd, 'wb') as f:
+                fd = None
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    f.write(chunk)
+                    nbytes += len(chunk)
+        # mkstemp 创建的文件只有所有者可读写，改为普通文件的权限
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if fd is not None:
+            os.close(fd)
+        stats.record(host, latency if latency is not None else time.perf_counter() - start, nbytes, failed=True)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    stats.record(host, latency, nbytes)
+    return nbytes
+
+
+_shared_session = None
+_shared_stats = HttpStats()
+_shared_session_lock = threading.Lock()
+
+
+def get_download_session():
+    """返回进程内共享的下载会话（首次调用时创建）。"""
+    global _shared_session
+    with _shared_session_lock:
+        if _shared_session is None:
+            _shared_session = build_session()
+        return _shared_session
+
+
+def get_http_stats():
+    """返回进程内共享的下载统计。"""
+    return _shared_stats
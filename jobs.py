@@ -0,0 +1,146 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 同时运行的后台任务数量上限
+DEFAULT_JOB_WORKERS = 4
+# 已结束的任务在内存中保留的时间 (秒)，超时后会被清理
+FINISHED_JOB_TTL = 60 * 60
+
+
+class JobCancelled(Exception):
+    """任务在运行过程中被用户取消。"""
+
+
+class Job:
+    """
+    一个后台任务的状态：运行阶段、进度计数、部分结果以及最终结果。
+    所有读写都通过内部锁完成，可以在工作线程和 Flask 请求线程之间安全共享。
+    """
+
+    def __init__(self, kind):
+        self.id = str(uuid.uuid4())
+        self.kind = kind
+        self.status = 'queued'
+        self.progress = {'phase': 'queued'}
+        self.partial_results = {}
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """供任务函数在安全点调用；任务已被取消时抛出 JobCancelled。"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def update_progress(self, **counters):
+        """合并更新进度信息 (例如 phase、fetched、filtered)。"""
+        self.check_cancelled()
+        with self._lock:
+            self.progress.update(counters)
+
+    def add_partial(self, group, items):
+        """把新产生的结果追加到指定分组的部分结果中。"""
+        self.check_cancelled()
+        if not items:
+            return
+        with self._lock:
+            self.partial_results.setdefault(group, []).extend(items)
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished_at = time.time()
+            self.progress['phase'] = status
+
+    def to_dict(self, include_partial=True):
+        with self._lock:
+            data = {
+                'job_id': self.id,
+                'kind': self.kind,
+                'status': self.status,
+                'progress': dict(self.progress),
+                'error': self.error,
+            }
+            if self.status == 'succeeded':
+                data['result'] = self.result
+            elif include_partial:
+                data['partial_results'] = {group: list(items) for group, items in self.partial_results.items()}
+        return data
+
+
+class JobManager:
+    """
+    进程内的后台任务管理器。
+    submit() 立即返回任务对象，任务函数在线程池中运行，并通过传入的 Job 报告进度。
+    """
+
+    def __init__(self, max_workers=DEFAULT_JOB_WORKERS, finished_ttl=FINISHED_JOB_TTL):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self.finished_ttl = finished_ttl
+
+    def submit(self, kind, func, *args, **kwargs):
+        """提交任务。func 的第一个参数为 Job，其返回值作为任务的最终结果。"""
+        self._prune()
+        job = Job(kind)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job.cancelled:
+            job._finish('cancelled')
+            return
+        with job._lock:
+            job.status = 'running'
+            job.progress['phase'] = 'running'
+        try:
+            result = func(job, *args, **kwargs)
+        except JobCancelled:
+            print(f"--- [Job {job.id}] 任务已取消 ---")
+            job._finish('cancelled')
+        except Exception as e:
+            print(f"--- [Job {job.id}] 任务执行出错 ---")
+            traceback.print_exc()
+            job._finish('failed', error=str(e))
+        else:
+            job._finish('cancelled' if job.cancelled else 'succeeded', result=result)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """请求取消任务；任务会在下一个安全点停止。返回任务是否存在。"""
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def _prune(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at is not None and now - job.finished_at > self.finished_ttl
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
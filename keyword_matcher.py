@@ -0,0 +1,103 @@
+import re
+
+
+def _is_word_char(ch):
+    # 与 re 模块中 Unicode 模式下的 \w 保持一致
+    return ch.isalnum() or ch == '_'
+
+
+def _at_word_boundary(text, index):
+    """判断 text 的 index 位置是否为单词边界 (等价于正则中的 \\b)。"""
+    before = index > 0 and _is_word_char(text[index - 1])
+    after = index < len(text) and _is_word_char(text[index])
+    return before != after
+
+
+def build_trie_pattern(terms):
+    """
+    把一组字面量关键词编译为一个前缀树形式的正则表达式。
+    共享前缀只匹配一次，并且在同一位置总是优先匹配最长的关键词。
+    """
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[''] = True
+
+    def build(node):
+        children = sorted((ch, child) for ch, child in node.items() if ch != '')
+        if not children:
+            return ''
+        alternatives = [re.escape(ch) + build(child) for ch, child in children]
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        # 当前节点本身也是一个完整关键词时，后续部分是可选的 (贪婪匹配保证优先取最长)
+        return '(?:' + body + ')?' if '' in node else body
+
+    return build(trie)
+
+
+class AbstractKeywordMatcher:
+    """
+    预编译的摘要关键词匹配器，由 arXiv 和 Semantic Scholar 两种搜索共用。
+
+    匹配规则与 abstract_keywords 的配置语义一致：
+    - 每个内层列表是一个 AND 组，组与组之间为 OR；
+    - 以 '*' 结尾的关键词要求全词匹配，否则为子字符串匹配，均不区分大小写。
+
+    所有关键词在构建时被合并为一个正则表达式，每篇摘要只需扫描一遍，
+    即可得到出现过的全部关键词 (包括相互重叠的关键词)。
+    """
+
+    def __init__(self, keyword_groups):
+        self.keyword_groups = [list(group) for group in (keyword_groups or [])]
+
+        # 每个组被解析为 [(小写关键词, 是否全词匹配)]，空关键词会被忽略
+        self._groups = []
+        terms = set()
+        for group in self.keyword_groups:
+            requirements = []
+            for kw in group:
+                clean_kw = kw.rstrip('*').lower()
+                if not clean_kw:
+                    continue
+                requirements.append((clean_kw, kw.endswith('*')))
+                terms.add(clean_kw)
+            self._groups.append((group, requirements))
+
+        self._pattern = re.compile('(?=(' + build_trie_pattern(terms) + '))') if terms else None
+        # 在同一位置命中最长关键词时，所有作为其前缀的关键词也同样出现在该位置
+        self._prefixes = {term: [other for other in terms if term.startswith(other)] for term in terms}
+
+    def __bool__(self):
+        return bool(self.keyword_groups)
+
+    def _scan(self, text):
+        """扫描一遍文本，返回 (以子字符串出现的关键词, 以完整单词出现的关键词)。"""
+        substring_hits = set()
+        whole_word_hits = set()
+        if self._pattern is None:
+            return substring_hits, whole_word_hits
+
+        for match in self._pattern.finditer(text):
+            start = match.start()
+            for term in self._prefixes[match.group(1)]:
+                substring_hits.add(term)
+                if term not in whole_word_hits and _at_word_boundary(text, start) \
+                        and _at_word_boundary(text, start + len(term)):
+                    whole_word_hits.add(term)
+        return substring_hits, whole_word_hits
+
+    def match(self, text):
+        """
+        返回所有匹配成功的 AND 组中的关键词 (保留原始写法，按组顺序拼接)。
+        没有任何组匹配时返回空列表。
+        """
+        substring_hits, whole_word_hits = self._scan((text or '').lower())
+
+        matched_keywords = []
+        for group, requirements in self._groups:
+            if all((clean_kw in whole_word_hits) if is_whole_word else (clean_kw in substring_hits)
+                   for clean_kw, is_whole_word in requirements):
+                matched_keywords.extend(group)
+        return matched_keywords
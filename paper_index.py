@@ -0,0 +1,272 @@
+import atexit
+import hashlib
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+from keyword_matcher import AbstractKeywordMatcher
+from response_cache import CACHE_DIR
+
+DEFAULT_INDEX_PATH = os.path.join(CACHE_DIR, 'paper_index.sqlite')
+# trigram 分词只能匹配长度不少于 3 个字符的子字符串
+MIN_TRIGRAM_TERM_LENGTH = 3
+
+
+def _fts_phrase(term):
+    """把关键词转换为 FTS5 短语 (双引号内的引号需要写成两个)。"""
+    return '"' + term.replace('"', '""') + '"'
+
+
+class PaperIndex:
+    """
+    已获取论文的本地全文索引 (SQLite FTS5)，用于修改摘要关键词后离线重新筛选，无需再次请求 API。
+
+    - papers 表按 (数据源, 论文 ID) 保存标题、摘要、会议、年份、作者，以及搜索模块输出所需的其他字段 (payload)；
+      摘要和标题通过 trigram 分词的 FTS5 表建立索引，可以直接回答子字符串查询；
+    - 每次在线搜索把获取到的论文登记到一个范围 (scope，由查询参数生成的键) 下，
+      离线查询时只在同一范围内重新筛选，结果与在线搜索一致；
+    - 范围记录是否包含搜索条件下的全部论文 (complete)：只有完整执行 (没有提前停止、请求没有出错)
+      并登记了全部论文 (两阶段获取模式只登记通过初筛的论文) 的搜索才会在最后一批写入后把范围标记为完整，
+      不完整的范围不能用于离线重新筛选。
+
+    写入由后台线程完成，不阻塞搜索；查询前调用 flush() 等待已提交的写入完成。
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS papers (
+                source TEXT NOT NULL,
+                paper_id TEXT NOT NULL,
+                title TEXT,
+                abstract TEXT,
+                venue TEXT,
+                year INTEGER,
+                authors TEXT,
+                updated TEXT,
+                payload TEXT NOT NULL,
+                indexed_at REAL NOT NULL,
+                UNIQUE (source, paper_id)
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS papers_fts USING fts5(
+                title, abstract, content='papers', content_rowid='rowid', tokenize='trigram'
+            );
+            CREATE TRIGGER IF NOT EXISTS papers_ai AFTER INSERT ON papers BEGIN
+                INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_ad AFTER DELETE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+            END;
+            CREATE TRIGGER IF NOT EXISTS papers_au AFTER UPDATE ON papers BEGIN
+                INSERT INTO papers_fts (papers_fts, rowid, title, abstract) VALUES ('delete', old.rowid, old.title, old.abstract);
+                INSERT INTO papers_fts (rowid, title, abstract) VALUES (new.rowid, new.title, new.abstract);
+            END;
+            CREATE TABLE IF NOT EXISTS scopes (
+                scope_key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                description TEXT,
+                updated_at REAL NOT NULL,
+                complete INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS paper_scopes (
+                scope_key TEXT NOT NULL,
+                paper_rowid INTEGER NOT NULL,
+                UNIQUE (scope_key, paper_rowid)
+            );
+            """
+        )
+        # 早期版本的索引没有 complete 列，补上后这些范围视为不完整
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(scopes)")]
+        if 'complete' not in columns:
+            self._conn.execute("ALTER TABLE scopes ADD COLUMN complete INTEGER NOT NULL DEFAULT 0")
+        self._conn.commit()
+
+    @staticmethod
+    def make_scope_key(source, **params):
+        """根据数据源和决定获取范围的查询参数生成稳定的范围键。"""
+        raw = json.dumps([source, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # --- 写入 ---
+
+    def add(self, source, rows, scope_key, description=None):
+        """
+        提交一批论文到后台写入线程。rows 中每一项为包含 paper_id、title、abstract、venue、year、
+        authors、updated (可选) 和 payload (JSON 可序列化的字典) 的字典。
+        """
+        if rows:
+            self._submit(self._write, source, list(rows), scope_key, description)
+
+    def mark_complete(self, scope_key, source, description=None):
+        """
+        在此前提交的所有批次写入之后，把范围标记为完整 (见 is_complete_scope)。
+        同一范围只要有一次搜索完整登记了全部论文，该范围即为完整的。
+        """
+        self._submit(self._write_complete, scope_key, source, description)
+
+    def _submit(self, func, *args):
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='paper-index-writer', daemon=True)
+                self._writer.start()
+        self._queue.put((func, args))
+
+    def flush(self):
+        """等待所有已提交的写入完成。"""
+        self._queue.join()
+
+    def _write_loop(self):
+        while True:
+            func, args = self._queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"  ! 写入本地论文索引时出错: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, source, rows, scope_key, description):
+        now = time.time()
+        with self._lock:
+            for row in rows:
+                payload = json.dumps(row['payload'], ensure_ascii=False, default=str)
+                values = (source, row['paper_id'], row.get('title'), row.get('abstract'), row.get('venue'),
+                          row.get('year'), row.get('authors'), row.get('updated'), payload, now)
+                # 内容没有变化时不更新，避免命中响应缓存的重复搜索反复重建全文索引
+                self._conn.execute(
+                    """
+                    INSERT INTO papers (source, paper_id, title, abstract, venue, year, authors, updated, payload, indexed_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (source, paper_id) DO UPDATE SET
+                        title = excluded.title, abstract = excluded.abstract, venue = excluded.venue,
+                        year = excluded.year, authors = excluded.authors, updated = excluded.updated,
+                        payload = excluded.payload, indexed_at = excluded.indexed_at
+                    WHERE papers.payload IS NOT excluded.payload OR papers.abstract IS NOT excluded.abstract
+                    """,
+                    values,
+                )
+                paper_rowid = self._conn.execute(
+                    "SELECT rowid FROM papers WHERE source = ? AND paper_id = ?", (source, row['paper_id'])
+                ).fetchone()[0]
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO paper_scopes (scope_key, paper_rowid) VALUES (?, ?)", (scope_key, paper_rowid)
+                )
+            self._upsert_scope(scope_key, source, description, now, complete=False)
+            self._conn.commit()
+
+    def _write_complete(self, scope_key, source, description):
+        with self._lock:
+            self._upsert_scope(scope_key, source, description, time.time(), complete=True)
+            self._conn.commit()
+
+    def _upsert_scope(self, scope_key, source, description, now, complete):
+        self._conn.execute(
+            """
+            INSERT INTO scopes (scope_key, source, description, updated_at, complete) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (scope_key) DO UPDATE SET
+                description = excluded.description, updated_at = excluded.updated_at,
+                complete = MAX(scopes.complete, excluded.complete)
+            """,
+            (scope_key, source, description, now, int(complete)),
+        )
+
+    # --- 查询 ---
+
+    def has_scope(self, scope_key):
+        self.flush()
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM scopes WHERE scope_key = ?", (scope_key,)).fetchone() is not None
+
+    def is_complete_scope(self, scope_key):
+        """范围是否包含搜索获取到的全部论文 (见 add 的 complete 参数)。"""
+        self.flush()
+        with self._lock:
+            row = self._conn.execute("SELECT complete FROM scopes WHERE scope_key = ?", (scope_key,)).fetchone()
+        return bool(row and row[0])
+
+    def iter_scope(self, scope_key, since=None):
+        """
+        按登记顺序返回范围内论文的 (payload 字典, 是否有摘要) 列表。
+        since 为 ISO 格式的时间字符串，只返回 updated 不早于该时间的论文 (用于 arXiv 时间窗口)。
+        """
+        self.flush()
+        sql = """
+            SELECT p.payload, p.abstract IS NOT NULL FROM paper_scopes s JOIN papers p ON p.rowid = s.paper_rowid
+            WHERE s.scope_key = ?
+        """
+        params = [scope_key]
+        if since is not None:
+            sql += " AND p.updated >= ?"
+            params.append(since)
+        sql += " ORDER BY s.rowid"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [(json.loads(payload), bool(has_abstract)) for payload, has_abstract in rows]
+
+    def match_abstracts(self, keyword_groups, scope_key):
+        """
+        在范围内按 abstract_keywords 的语义 (组内 AND、组间 OR，'*' 结尾为全词匹配) 匹配摘要，
+        返回 {论文 ID: 匹配的关键词列表}，关键词的顺序与 AbstractKeywordMatcher.match 相同。
+
+        trigram 全文索引可以精确回答长度不少于 3 的子字符串关键词；
+        含有全词匹配或过短关键词的组先用索引缩小候选范围，再用 AbstractKeywordMatcher 逐篇确认。
+        """
+        self.flush()
+        matches = {}
+        for group in keyword_groups or []:
+            requirements = [(kw.rstrip('*').lower(), kw.endswith('*')) for kw in group if kw.rstrip('*')]
+            indexed_terms = [term for term, _ in requirements if len(term) >= MIN_TRIGRAM_TERM_LENGTH]
+            exact = len(indexed_terms) == len(requirements) and not any(whole for _, whole in requirements)
+
+            sql = f"""
+                SELECT p.paper_id{'' if exact else ', p.abstract'} FROM paper_scopes s JOIN papers p ON p.rowid = s.paper_rowid
+                WHERE s.scope_key = ? AND p.abstract IS NOT NULL
+            """
+            params = [scope_key]
+            if indexed_terms:
+                sql += " AND p.rowid IN (SELECT rowid FROM papers_fts WHERE papers_fts MATCH ?)"
+                params.append('abstract : (' + ' AND '.join(_fts_phrase(term) for term in indexed_terms) + ')')
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+
+            if exact:
+                matched_ids = [row[0] for row in rows]
+            else:
+                group_matcher = AbstractKeywordMatcher([group])
+                matched_ids = [paper_id for paper_id, abstract in rows if group_matcher.match(abstract)]
+            for paper_id in matched_ids:
+                matches.setdefault(paper_id, []).extend(group)
+        return matches
+
+    def stats(self):
+        """返回索引中的论文数量和范围数量。"""
+        self.flush()
+        with self._lock:
+            papers = self._conn.execute("SELECT source, COUNT(*) FROM papers GROUP BY source").fetchall()
+            scopes = self._conn.execute("SELECT COUNT(*) FROM scopes").fetchone()[0]
+        return {'papers': dict(papers), 'scopes': scopes}
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_paper_index():
+    """返回进程内共享的本地论文索引（首次调用时创建）。"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = PaperIndex()
+            # 写入线程是守护线程，退出前等待已提交的写入完成
+            atexit.register(_shared_index.flush)
+        return _shared_index
@@ -0,0 +1,185 @@
+import re
+
+from pdf_store import arxiv_id_from_url
+from title_matcher import TitleMatcher, normalize_title
+
+# 没有作者信息时，用标题的前几个词作为分块键
+TITLE_BLOCK_WORDS = 3
+
+_ARXIV_VERSION_RE = re.compile(r'v\d+$')
+
+
+def _base_arxiv_id(arxiv_id):
+    """去掉版本号后的 arXiv ID (Semantic Scholar 的 externalIds 不含版本号)。"""
+    return _ARXIV_VERSION_RE.sub('', arxiv_id.strip().lower()) if arxiv_id else None
+
+
+def _record_arxiv_id(record):
+    return record.get('arxiv_id') or arxiv_id_from_url(record.get('pdf_url')) or arxiv_id_from_url(record.get('url'))
+
+
+def _identity_keys(record):
+    """返回论文的精确标识键 (DOI 和不含版本号的 arXiv ID)。"""
+    keys = []
+    if record.get('doi'):
+        keys.append(f"doi:{record['doi'].strip().lower()}")
+    arxiv_id = _base_arxiv_id(_record_arxiv_id(record))
+    if arxiv_id:
+        keys.append(f"arxiv:{arxiv_id}")
+    return keys
+
+
+def _block_key(record):
+    """
+    模糊匹配的分块键：优先使用第一作者的名字首字母加姓 (归一化后，兼容 "H. Wang" 与 "Hanrui Wang")，
+    没有作者时使用标题的前几个词。只有同一块内的论文才会比较标题，避免对所有论文两两比较。
+    """
+    first_author = (record.get('author') or '').split(',')[0]
+    name_parts = normalize_title(first_author).split()
+    if name_parts:
+        return f"au:{name_parts[0][0]} {name_parts[-1]}"
+    words = normalize_title(record.get('title')).split()
+    return f"ti:{' '.join(words[:TITLE_BLOCK_WORDS])}" if words else None
+
+
+def _join_keywords(*values):
+    keywords = {kw.strip() for value in values if value for kw in value.split(',') if kw.strip()}
+    return ", ".join(sorted(keywords))
+
+
+class PaperMerger:
+    """
+    合并 arXiv 与 Semantic Scholar 搜索结果，识别同一篇论文的预印本与正式发表版本。
+
+    匹配顺序：
+    1. DOI 或 arXiv ID (忽略版本号) 相同的论文直接合并；
+    2. 否则在同一分块 (第一作者) 内，与其他来源的论文按标题模糊匹配 (见 title_matcher)。
+       同一来源中标题相近的两篇论文 (例如系列论文) 不会被合并。
+
+    合并后的记录同时保留会议信息 (venue_name/category/citations，来自 Semantic Scholar)
+    和预印本信息 (pdf_url/published/updated，来自 arXiv)，sources 字段列出论文出现过的来源。
+    同一来源内的重复论文 (例如 arXiv 多个搜索方向命中同一篇) 也会被合并。
+    """
+
+    def __init__(self):
+        self._records = []
+        self._by_identity = {}
+        # 分块键 -> {来源: (TitleMatcher, 各候选对应的记录下标)}
+        self._blocks = {}
+        self.stats = {'input': 0, 'identity_matches': 0, 'title_matches': 0}
+
+    def _find(self, record, source):
+        for key in _identity_keys(record):
+            index = self._by_identity.get(key)
+            if index is not None:
+                self.stats['identity_matches'] += 1
+                return index
+        best = None
+        for other_source, (matcher, indices) in self._blocks.get(_block_key(record), {}).items():
+            if other_source == source:
+                continue
+            match = matcher.match(record.get('title'))
+            if match is not None and source not in self._records[indices[match[0]]]['sources'] \
+                    and (best is None or match[1] > best[1]):
+                best = (indices[match[0]], match[1])
+        if best is not None:
+            self.stats['title_matches'] += 1
+            return best[0]
+        return None
+
+    def _index(self, index, record, source, is_new):
+        for key in _identity_keys(record):
+            self._by_identity.setdefault(key, index)
+        block_key = _block_key(record)
+        if is_new and block_key is not None and record.get('title'):
+            block = self._blocks.setdefault(block_key, {})
+            matcher, indices = block.setdefault(source, (TitleMatcher(), []))
+            matcher.add(record['title'])
+            indices.append(index)
+
+    def add(self, record, source):
+        """加入一条搜索结果 (source 为 'semantic_scholar' 或 'arxiv')，返回其所属的合并记录。"""
+        self.stats['input'] += 1
+        index = self._find(record, source)
+        is_new = index is None
+        if is_new:
+            index = len(self._records)
+            self._records.append(self._new_record(record, source))
+        else:
+            self._merge_into(self._records[index], record, source)
+        # 合并进来的记录可能带来新的标识 (例如 arXiv 版本补充了 DOI)，一并加入索引
+        self._index(index, record, source, is_new)
+        return self._records[index]
+
+    def add_all(self, records, source):
+        for record in records:
+            self.add(record, source)
+
+    def records(self):
+        return list(self._records)
+
+    @staticmethod
+    def _new_record(record, source):
+        merged = {
+            'title': record.get('title'),
+            'author': record.get('author'),
+            'year': record.get('year'),
+            'venue_name': None,
+            'category': None,
+            'citations': None,
+            'paperId': None,
+            'url': record.get('url'),
+            'doi': record.get('doi'),
+            'arxiv_id': None,
+            'pdf_url': None,
+            'published': None,
+            'updated': None,
+            'directions': [],
+            'matched_keywords': '',
+            'sources': [],
+        }
+        PaperMerger._merge_into(merged, record, source)
+        return merged
+
+    @staticmethod
+    def _merge_into(merged, record, source):
+        if source not in merged['sources']:
+            merged['sources'].append(source)
+        merged['doi'] = merged['doi'] or record.get('doi')
+        merged['arxiv_id'] = merged['arxiv_id'] or _record_arxiv_id(record)
+        merged['matched_keywords'] = _join_keywords(
+            merged['matched_keywords'], record.get('matched_keywords') or record.get('matched_abstract_keywords')
+        )
+
+        if source == 'semantic_scholar':
+            # 会议版本的元数据优先：标题、作者、年份、链接以正式发表版本为准
+            merged['title'] = record.get('title') or merged['title']
+            merged['author'] = record.get('author') or merged['author']
+            merged['year'] = record.get('year') or merged['year']
+            merged['url'] = record.get('url') or merged['url']
+            merged['venue_name'] = record.get('venue_name')
+            merged['category'] = record.get('category')
+            merged['citations'] = record.get('citations')
+            merged['paperId'] = record.get('paperId')
+        else:
+            merged['pdf_url'] = merged['pdf_url'] or record.get('pdf_url')
+            merged['published'] = merged['published'] or record.get('published')
+            merged['updated'] = max(filter(None, [merged['updated'], record.get('updated')]), default=None)
+            merged['venue_name'] = merged['venue_name'] or record.get('venue_name')
+            direction = record.get('direction')
+            if direction and direction not in merged['directions']:
+                merged['directions'].append(direction)
+
+
+def merge_search_results(semantic_papers, arxiv_papers):
+    """
+    合并两种搜索的结果，返回 (合并后的记录列表, 统计信息)。
+    先加入 Semantic Scholar 结果，再加入 arXiv 结果，使会议版本成为合并记录的主体。
+    """
+    merger = PaperMerger()
+    merger.add_all(semantic_papers, 'semantic_scholar')
+    merger.add_all(arxiv_papers, 'arxiv')
+    records = merger.records()
+    stats = dict(merger.stats, output=len(records),
+                 both_sources=sum(1 for r in records if len(r['sources']) > 1))
+    return records, stats
@@ -0,0 +1,80 @@
+from collections.abc import Mapping
+
+
+class PaperRecord(Mapping):
+    """
+    紧凑的论文记录基类：字段保存在 __slots__ 中，不为每篇论文创建字典。
+
+    记录实现只读的映射接口 (record['title']、record.get('url')、dict(record)、keys/items)，
+    因此原先使用论文字典的代码 (报告导出的列定义、下载、合并等) 不需要修改；
+    也可以通过 record['field'] = value 或 update() 修改已声明的字段，但不能添加新字段。
+    序列化为 JSON 时使用 to_dict() 或 json_default，只在序列化时临时构建字典。
+    """
+
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"{type(self).__name__} 不支持的字段: {', '.join(fields)}")
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def update(self, fields=(), **kwargs):
+        """与 dict.update 相同，但只能更新已声明的字段。"""
+        items = fields.items() if isinstance(fields, Mapping) else fields
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+
+class S2SearchPaper(PaperRecord):
+    """Semantic Scholar 搜索结果投影后的论文 (只保留筛选和输出所需的字段)。"""
+
+    __slots__ = ('paperId', 'title', 'venue', 'year', 'authors', 'citationCount', 'abstract', 'url', 'arxiv_id', 'doi')
+
+
+class SemanticScholarRecord(PaperRecord):
+    """通过筛选的 Semantic Scholar 论文，字段即前端、报告导出和合并使用的格式。"""
+
+    __slots__ = ('title', 'author', 'year', 'venue_name', 'category', 'url', 'matched_keywords', 'citations',
+                 'paperId', 'arxiv_id', 'doi')
+
+
+class ArxivRecord(PaperRecord):
+    """通过筛选的 arXiv 论文，字段即前端、报告导出和合并使用的格式。"""
+
+    __slots__ = ('direction', 'title', 'author', 'year', 'url', 'summary', 'venue_name', 'published', 'updated',
+                 'primary_category', 'categories', 'pdf_url', 'doi', 'matched_keywords')
+
+
+def json_default(obj):
+    """供 json.dumps(default=...) 使用：把论文记录转换为字典，其他类型按 json 模块的默认行为报错。"""
+    if isinstance(obj, PaperRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+
+from response_cache import CACHE_DIR
+from http_session import download_to_file
+
+DEFAULT_PDF_STORE_DIR = os.path.join(CACHE_DIR, 'pdfs')
+# PDF 存储的空间上限 (字节)，超出时按最近使用时间淘汰
+DEFAULT_PDF_STORE_MAX_BYTES = 4 * 1024 * 1024 * 1024
+
+_ARXIV_URL_RE = re.compile(r'arxiv\.org/(?:abs|pdf)/([^?#\s]+?)(?:\.pdf)?$', re.IGNORECASE)
+_ARXIV_ID_RE = re.compile(r'^(?:\d{4}\.\d{4,5}|[a-z\-]+(?:\.[A-Z]{2})?/\d{7})(?:v\d+)?$', re.IGNORECASE)
+
+
+def arxiv_id_from_url(url):
+    """从 arXiv 的 abs/pdf 链接中提取论文 ID (含版本号)，不是 arXiv 链接时返回 None。"""
+    if not url:
+        return None
+    match = _ARXIV_URL_RE.search(url.strip())
+    if not match or not _ARXIV_ID_RE.match(match.group(1)):
+        return None
+    return match.group(1)
+
+
+def pdf_key(arxiv_id=None, doi=None):
+    """生成 PDF 存储键：优先使用 arXiv ID，其次使用 DOI，两者都没有时返回 None。"""
+    if arxiv_id:
+        return f"arxiv:{arxiv_id.strip().lower()}"
+    if doi:
+        return f"doi:{doi.strip().lower()}"
+    return None
+
+
+def paper_pdf_key(paper):
+    """根据论文记录中的 arxiv_id / doi / pdf_url / url 字段推断其 PDF 存储键。"""
+    arxiv_id = paper.get('arxiv_id') or arxiv_id_from_url(paper.get('pdf_url')) or arxiv_id_from_url(paper.get('url'))
+    return pdf_key(arxiv_id=arxiv_id, doi=paper.get('doi'))
+
+
+class PdfStore:
+    """
+    按 arXiv ID 或 DOI 寻址的本地 PDF 存储。
+    每个 PDF 以存储键的 SHA-256 命名保存一份，下载目录中的文件通过硬链接 (不支持时复制) 指向它，
+    因此同一篇论文在不同会话中只需从网络下载一次。总大小超过上限时，按最近使用时间 (文件 mtime) 淘汰。
+    """
+
+    def __init__(self, root=DEFAULT_PDF_STORE_DIR, max_bytes=DEFAULT_PDF_STORE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 每个存储键一把锁，同一篇论文同时只有一个线程下载；
+        # 值为 [锁, 使用者数量]，最后一个使用者释放时删除，避免字典随下载过的论文无限增长
+        self._key_locks = {}
+        os.makedirs(root, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def path_for(self, key):
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.root, digest[:2], f"{digest}.pdf")
+
+    def lookup(self, key):
+        """返回已存储的 PDF 路径并更新其最近使用时间；不存在时返回 None。"""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def fetch(self, key, url):
+        """返回 key 对应的 PDF 路径；本地没有时先从 url 下载到存储中。下载失败时抛出异常。"""
+        path = self.lookup(key)
+        if path is not None:
+            return path
+        with self._lock:
+            entry = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # 等待锁期间其他线程可能已经下载完成 (例如同一篇论文出现在多个方向或分组中)
+                path = self.lookup(key)
+                if path is not None:
+                    return path
+                path = self.path_for(key)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                nbytes = download_to_file(url, path)
+                with self._lock:
+                    self._total_bytes += nbytes
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._key_locks[key]
+        self._evict_if_needed(keep=path)
+        return path
+
+    @staticmethod
+    def link_into(path, dest):
+        """把存储中的 PDF 放到 dest：优先创建硬链接，跨文件系统等情况下退回到复制。"""
+        if os.path.exists(dest):
+            os.remove(dest)
+        try:
+            os.link(path, dest)
+        except OSError:
+            shutil.copyfile(path, dest)
+
+    def _scan(self):
+        """返回存储中所有 PDF 的 (mtime, 大小, 路径)。"""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith('.pdf'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_if_needed(self, keep=None):
+        with self._lock:
+            if self._total_bytes <= self.max_bytes:
+                return
+            entries = sorted(self._scan())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+            self._total_bytes = total
+
+    def stats(self):
+        """返回存储目录、当前占用空间和空间上限 (字节)。"""
+        with self._lock:
+            return {'path': self.root, 'bytes': self._total_bytes, 'max_bytes': self.max_bytes}
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_pdf_store():
+    """返回进程内共享的 PDF 存储（首次调用时创建）。"""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            _shared_store = PdfStore()
+        return _shared_store
@@ -0,0 +1,271 @@
+import csv
+import gzip
+import io
+import json
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.styles import Alignment, Border, Font, Side
+from openpyxl.utils import get_column_letter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet 导出是可选功能，未安装 pyarrow 时不可用
+    pa = pq = None
+
+# 自动列宽在最长内容的基础上额外增加的宽度
+COLUMN_WIDTH_PADDING = 4
+# Excel 工作表名称长度上限
+SHEET_NAME_MAX_LENGTH = 31
+
+# 导出格式 -> (文件扩展名, MIME 类型)。除 Excel 外的格式把所有工作表写入同一个表，并增加一列分组名称
+EXPORT_FORMATS = {
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('.csv.gz', 'application/gzip'),
+    'jsonl': ('.jsonl', 'application/x-ndjson'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+}
+DEFAULT_EXPORT_FORMAT = 'xlsx'
+DEFAULT_GROUP_HEADER = '分组'
+# CSV 的 gzip 压缩级别：默认的 9 级比 6 级慢数倍，文件只小几个百分点
+CSV_COMPRESS_LEVEL = 6
+
+# 与 pandas.DataFrame.to_excel 的表头样式一致：粗体、细边框、居中
+_THIN = Side(style='thin')
+_HEADER_FONT = Font(bold=True)
+_HEADER_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_HEADER_ALIGNMENT = Alignment(horizontal='center', vertical='top')
+
+
+def safe_sheet_name(name):
+    """去掉工作表名称中 Excel 不支持的字符，并截断到长度上限。"""
+    safe_name = "".join(c for c in str(name) if c.isalnum() or c in (' ', '_')).rstrip()
+    return safe_name[:SHEET_NAME_MAX_LENGTH]
+
+
+def _cell_value(value):
+    """把论文字段转换为可以写入单元格的值，并去掉 Excel 不允许的控制字符。"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return ILLEGAL_CHARACTERS_RE.sub('', value)
+    if isinstance(value, (int, float)):
+        return value
+    return ILLEGAL_CHARACTERS_RE.sub('', str(value))
+
+
+def _header_cell(worksheet, header):
+    cell = WriteOnlyCell(worksheet, value=header)
+    cell.font = _HEADER_FONT
+    cell.border = _HEADER_BORDER
+    cell.alignment = _HEADER_ALIGNMENT
+    return cell
+
+
+class ExcelReportWriter:
+    """
+    以 openpyxl 的只写 (write_only) 模式逐个工作表生成 Excel 报告。
+
+    每个工作表由列定义 [(表头, 字段名或取值函数), ...] 和论文字典列表描述，
+    行数据直接从论文字典生成，不构建中间的 DataFrame。列宽在生成行数据的同一次遍历中计算，
+    并在写入第一行之前设置 (只写模式要求列宽先于数据写入)；单元格写入后不再保留在内存中。
+    """
+
+    def __init__(self):
+        self._workbook = Workbook(write_only=True)
+        self.sheet_count = 0
+
+    def add_sheet(self, sheet_name, columns, papers):
+        """添加一个工作表，返回写入的行数。"""
+        getters = _column_getters(columns)
+        widths = [len(str(header)) for header, _ in columns]
+        rows = []
+        for paper in papers:
+            row = tuple(_cell_value(getter(paper)) for getter in getters)
+            for idx, value in enumerate(row):
+                if value is not None:
+                    length = len(value) if isinstance(value, str) else len(str(value))
+                    if length > widths[idx]:
+                        widths[idx] = length
+            rows.append(row)
+
+        worksheet = self._workbook.create_sheet(title=sheet_name)
+        for idx, width in enumerate(widths, 1):
+            worksheet.column_dimensions[get_column_letter(idx)].width = width + COLUMN_WIDTH_PADDING
+        worksheet.append([_header_cell(worksheet, header) for header, _ in columns])
+        for row in rows:
+            worksheet.append(row)
+        self.sheet_count += 1
+        return len(rows)
+
+    def save(self, target):
+        """保存到文件路径或文件对象。只写模式的工作簿只能保存一次。"""
+        self._workbook.save(target)
+        return target
+
+
+def available_export_formats():
+    """返回当前环境可用的导出格式 (Parquet 需要 pyarrow)。"""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != 'parquet' or pa is not None]
+
+
+def export_filename(prefix, fmt):
+    """返回带有对应扩展名的导出文件名。"""
+    return prefix + EXPORT_FORMATS[fmt][0]
+
+
+def export_mimetype(fmt):
+    return EXPORT_FORMATS[fmt][1]
+
+
+def check_export_format(fmt):
+    """检查导出格式是否受支持且可用，不可用时抛出 ValueError。"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {fmt} (可选: {', '.join(EXPORT_FORMATS)})")
+    if fmt not in available_export_formats():
+        raise ValueError(f"导出格式 {fmt} 需要安装 pyarrow")
+    return fmt
+
+
+def _column_getters(columns):
+    return [key if callable(key) else (lambda paper, key=key: paper.get(key)) for _, key in columns]
+
+
+def _iter_rows(sheets):
+    """把 sheets 展开为 (分组名称, 表头列表, 行数据生成器)，行数据直接由论文字典生成。"""
+    for sheet_name, columns, papers in sheets:
+        getters = _column_getters(columns)
+        headers = [header for header, _ in columns]
+        yield sheet_name, headers, ([getter(paper) for getter in getters] for paper in papers)
+
+
+class _TextTarget:
+    """以文本方式写入文件路径或二进制文件对象，可选 gzip 压缩；关闭时不关闭调用方传入的文件对象。"""
+
+    def __init__(self, target, compress=False):
+        self._owns_file = isinstance(target, (str, bytes)) or hasattr(target, '__fspath__')
+        self._raw = open(target, 'wb') if self._owns_file else target
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb', compresslevel=CSV_COMPRESS_LEVEL) if compress else None
+        self.stream = io.TextIOWrapper(self._gzip or self._raw, encoding='utf-8', newline='')
+
+    def __enter__(self):
+        return self.stream
+
+    def __exit__(self, *exc_info):
+        self.stream.flush()
+        # 先分离包装层，避免关闭调用方的文件对象
+        self.stream.detach()
+        if self._gzip is not None:
+            self._gzip.close()
+        if self._owns_file:
+            self._raw.close()
+
+
+def write_csv_report(target, sheets, group_header=DEFAULT_GROUP_HEADER):
+    """写入 gzip 压缩的 CSV：第一列为分组 (工作表) 名称，表头取第一个工作表的列定义。"""
+    with _TextTarget(target, compress=True) as stream:
+        writer = csv.writer(stream)
+        header_written = False
+        for sheet_name, headers, rows in _iter_rows(sheets):
+            if not header_written:
+                writer.writerow([group_header] + headers)
+                header_written = True
+            for row in rows:
+                writer.writerow([sheet_name] + row)
+    return target
+
+
+def write_jsonl_report(target, sheets, group_header=DEFAULT_GROUP_HEADER):
+    """逐行写入 JSON Lines，每篇论文一个对象，键为表头，另加分组名称。"""
+    with _TextTarget(target) as stream:
+        for sheet_name, headers, rows in _iter_rows(sheets):
+            for row in rows:
+                record = {group_header: sheet_name}
+                record.update(zip(headers, row))
+                stream.write(json.dumps(record, ensure_ascii=False, default=str))
+                stream.write('\n')
+    return target
+
+
+def _parquet_type(values):
+    """根据一列中的非空值推断 Parquet 列类型：全为整数时为 int64，全为数字时为 float64，否则为字符串。"""
+    non_null = [value for value in values if value is not None]
+    if non_null and all(isinstance(value, int) and not isinstance(value, bool) for value in non_null):
+        return pa.int64()
+    if non_null and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in non_null):
+        return pa.float64()
+    return pa.string()
+
+
+def write_parquet_report(target, sheets, group_header=DEFAULT_GROUP_HEADER):
+    """
+    写入 Parquet 文件，每个工作表一个行组。列类型由全部数据推断，
+    因此先把各工作表的行数据按列收集 (只保存对原有值的引用)，再逐个行组写入。
+    """
+    check_export_format('parquet')
+    sheet_columns = []
+    headers = None
+    for sheet_name, sheet_headers, rows in _iter_rows(sheets):
+        headers = headers or sheet_headers
+        columns = [list(column) for column in zip(*rows)] or [[] for _ in sheet_headers]
+        sheet_columns.append((sheet_name, columns))
+    if headers is None:
+        headers = []
+
+    types = [_parquet_type(value for _, columns in sheet_columns for value in columns[idx])
+             for idx in range(len(headers))]
+    schema = pa.schema([(group_header, pa.string())] + list(zip(headers, types)))
+
+    def convert(value, column_type):
+        if value is None or column_type != pa.string():
+            return value
+        return value if isinstance(value, str) else str(value)
+
+    with pq.ParquetWriter(target, schema, compression='zstd') as writer:
+        for sheet_name, columns in sheet_columns:
+            count = len(columns[0]) if columns else 0
+            arrays = [pa.array([sheet_name] * count, pa.string())]
+            arrays += [pa.array([convert(value, column_type) for value in column], column_type)
+                       for column, column_type in zip(columns, types)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    return target
+
+
+def write_report(target, sheets, fmt=DEFAULT_EXPORT_FORMAT, group_header=DEFAULT_GROUP_HEADER):
+    """按 fmt 把 sheets ([(工作表名称, 列定义, 论文列表), ...]) 写入 target (文件路径或二进制文件对象)。"""
+    check_export_format(fmt)
+    if fmt == 'xlsx':
+        return write_excel_report(target, sheets)
+    writers = {'csv': write_csv_report, 'jsonl': write_jsonl_report, 'parquet': write_parquet_report}
+    return writers[fmt](target, sheets, group_header=group_header)
+
+
+def report_bytes(sheets, fmt=DEFAULT_EXPORT_FORMAT, group_header=DEFAULT_GROUP_HEADER):
+    """与 write_report 相同，但写入内存并返回指针位于开头的 BytesIO。"""
+    output = io.BytesIO()
+    write_report(output, sheets, fmt=fmt, group_header=group_header)
+    output.seek(0)
+    return output
+
+
+def write_excel_report(target, sheets):
+    """
+    把 sheets ([(工作表名称, 列定义, 论文列表), ...]) 写入 target (文件路径或文件对象)。
+    没有任何工作表时 Excel 无法打开文件，因此写入一个空工作表。
+    """
+    writer = ExcelReportWriter()
+    for sheet_name, columns, papers in sheets:
+        writer.add_sheet(sheet_name, columns, papers)
+    if writer.sheet_count == 0:
+        writer.add_sheet('Sheet1', [], [])
+    return writer.save(target)
+
+
+def excel_report_bytes(sheets):
+    """与 write_excel_report 相同，但写入内存并返回指针位于开头的 BytesIO。"""
+    output = io.BytesIO()
+    write_excel_report(output, sheets)
+    output.seek(0)
+    return output
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+# 缓存文件默认存放在项目目录下的 .cache 文件夹中
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache')
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, 'responses.sqlite')
+
+# 各数据源的缓存有效期 (秒)：arXiv 的新论文更新频繁，Semantic Scholar 的会议论文变化较慢
+DEFAULT_TTLS = {
+    'arxiv': 60 * 60,
+    'semantic_scholar': 24 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+# 缓存总大小上限 (压缩后的字节数)，超出时按最近最少使用 (LRU) 顺序淘汰
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class ResponseCache:
+    """
+    基于 SQLite 的本地 API 响应缓存。
+    以 (数据源, 查询参数) 为键保存已经投影为纯字典的 API 结果，
+    支持按数据源设置过期时间、按总大小进行 LRU 淘汰，并统计命中/未命中次数。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttls=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {}
+
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(source, **params):
+        """根据数据源和查询参数生成稳定的缓存键。"""
+        raw = json.dumps([source, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _count(self, source, outcome):
+        source_stats = self._stats.setdefault(source, {'hits': 0, 'misses': 0})
+        source_stats[outcome] += 1
+
+    def get(self, source, key):
+        """读取缓存。未命中或已过期时返回 None。"""
+        ttl = self.ttls.get(source, DEFAULT_TTL)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > ttl:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self._count(source, 'misses')
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._count(source, 'hits')
+        return json.loads(zlib.decompress(row[0]).decode('utf-8'))
+
+    def set(self, source, key, value):
+        """写入缓存，并在超出大小上限时淘汰最久未使用的条目。"""
+        payload = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, source, payload, size, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, source, payload, len(payload), now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_access").fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        """返回命中/未命中计数以及当前缓存的条目数和大小。"""
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return {
+                'sources': {source: dict(counts) for source, counts in self._stats.items()},
+                'entries': entries,
+                'bytes': size,
+            }
+
+    def clear(self):
+        """清空所有缓存条目。"""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """返回进程内共享的响应缓存（首次调用时创建）。"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResponseCache()
+        return _shared_cache
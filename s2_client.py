@@ -0,0 +1,196 @@
+import asyncio
+import atexit
+import os
+import threading
+import time
+
+import httpx
+from semanticscholar.ApiRequester import ApiRequester
+from semanticscholar.SemanticScholar import SemanticScholar
+from semanticscholar.SemanticScholarException import (
+    BadQueryParametersException, GatewayTimeoutException,
+    InternalServerErrorException, ObjectNotFoundException)
+from tenacity import retry as rerun
+from tenacity import retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# Semantic Scholar API 的默认请求速率 (每秒请求数)，与 API key 的默认配额一致；可通过环境变量覆盖
+DEFAULT_S2_REQUESTS_PER_SECOND = float(os.environ.get('S2_REQUESTS_PER_SECOND', 1.0))
+# 令牌桶容量，允许的最大突发请求数
+DEFAULT_S2_BURST = int(os.environ.get('S2_BURST', 1))
+# 单次请求超时 (秒)
+DEFAULT_S2_TIMEOUT = 30
+# 遇到 429 (请求过多) 时的最大尝试次数，两次尝试之间指数退避
+S2_MAX_ATTEMPTS = 10
+# 每个客户端连接池中保持的最大连接数
+S2_POOL_SIZE = 8
+
+
+class TokenBucket:
+    """
+    线程安全的令牌桶限流器。
+    令牌以 rate 个/秒的速度补充，最多积累 capacity 个；acquire() 在没有令牌时阻塞等待。
+    """
+
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(capacity))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """预订一个令牌，返回需要等待的秒数 (令牌余额可以为负，表示已被后续等待者预订)。"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def acquire(self):
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self):
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class RateLimitedApiRequester(ApiRequester):
+    """
+    替换 semanticscholar 库默认请求器的实现：
+    - 库默认每个请求新建一个 httpx.AsyncClient (每次都要重新建立 TLS 连接)，
+      这里改为复用一个线程安全、带连接池的 httpx.Client，在线程中执行请求；
+    - 每次请求 (包括分页结果的每一页和每次重试) 之前先从令牌桶获取令牌。
+    """
+
+    def __init__(self, timeout, retry=True, limiter=None, http_client=None):
+        super().__init__(timeout, retry)
+        self.limiter = limiter
+        self.http_client = http_client or httpx.Client(
+            limits=httpx.Limits(max_connections=S2_POOL_SIZE, max_keepalive_connections=S2_POOL_SIZE),
+        )
+
+    @rerun(
+        wait=wait_exponential(min=5, max=60),
+        retry=retry_if_exception_type(ConnectionRefusedError),
+        stop=stop_after_attempt(S2_MAX_ATTEMPTS),
+    )
+    async def _get_data_async(self, url, parameters, headers, payload=None):
+        if self.limiter is not None:
+            await self.limiter.acquire_async()
+        parameters = parameters.lstrip("&")
+        method = 'POST' if payload else 'GET'
+        r = await asyncio.to_thread(
+            self.http_client.request, method, url, params=parameters,
+            timeout=self.timeout, headers=headers, json=payload,
+        )
+        return self._parse_response(r)
+
+    @staticmethod
+    def _parse_response(r):
+        """与 semanticscholar 库的处理保持一致：把错误状态码转换为库定义的异常。"""
+        data = {}
+        if r.status_code == 200:
+            data = r.json()
+            if len(data) == 1 and 'error' in data:
+                data = {}
+        elif r.status_code == 400:
+            raise BadQueryParametersException(r.json()['error'])
+        elif r.status_code == 403:
+            raise PermissionError('HTTP status 403 Forbidden.')
+        elif r.status_code == 404:
+            raise ObjectNotFoundException(r.json()['error'])
+        elif r.status_code == 429:
+            raise ConnectionRefusedError('HTTP status 429 Too Many Requests.')
+        elif r.status_code == 500:
+            raise InternalServerErrorException(r.json()['message'])
+        elif r.status_code == 504:
+            raise GatewayTimeoutException(r.json()['message'])
+        return data
+
+    def close(self):
+        self.http_client.close()
+
+
+def create_s2_client(limiter=None, api_key=None, timeout=DEFAULT_S2_TIMEOUT, retry=True):
+    """创建一个复用连接池、所有请求都经过给定令牌桶限流的 SemanticScholar 客户端。"""
+    client = SemanticScholar(timeout=timeout, api_key=api_key, retry=retry)
+    # semanticscholar 库没有公开替换请求器的接口，这里替换其内部异步客户端的请求器
+    # (requirements.txt 固定了库的版本；内部结构变化时直接报错，而不是静默地失去限流)
+    async_client = getattr(client, '_AsyncSemanticScholar', None)
+    if not isinstance(getattr(async_client, '_requester', None), ApiRequester):
+        raise RuntimeError("当前版本的 semanticscholar 库不支持替换请求器，请安装 requirements.txt 中指定的版本。")
+    async_client._requester = RateLimitedApiRequester(timeout, retry, limiter)
+    return client
+
+
+class S2ClientManager:
+    """
+    按 API key 管理 SemanticScholar 客户端。每个 API key (包括不使用 key 的匿名访问) 对应
+    一个客户端、一个连接池和一个令牌桶：Semantic Scholar 的配额按 key 计算，
+    同一进程中的所有 Web 请求和命令行主题都复用同一个客户端，而不是每次搜索都重新创建。
+    """
+
+    def __init__(self, rate=DEFAULT_S2_REQUESTS_PER_SECOND, burst=DEFAULT_S2_BURST,
+                 timeout=DEFAULT_S2_TIMEOUT, retry=True):
+        self.rate = rate
+        self.burst = burst
+        self.timeout = timeout
+        self.retry = retry
+        self._clients = {}
+        self._limiters = {}
+        self._lock = threading.Lock()
+
+    def _get_limiter_locked(self, api_key):
+        limiter = self._limiters.get(api_key)
+        if limiter is None:
+            limiter = self._limiters[api_key] = TokenBucket(self.rate, self.burst)
+        return limiter
+
+    def get_client(self, api_key=None):
+        """返回 api_key 对应的客户端（首次调用时创建）。"""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                limiter = self._get_limiter_locked(api_key)
+                client = self._clients[api_key] = create_s2_client(
+                    limiter, api_key=api_key, timeout=self.timeout, retry=self.retry,
+                )
+            return client
+
+    def close(self):
+        """关闭所有客户端的连接池。"""
+        with self._lock:
+            for client in self._clients.values():
+                client._AsyncSemanticScholar._requester.close()
+            self._clients.clear()
+
+
+def resolve_s2_api_key(settings=None):
+    """搜索设置中的 s2_api_key 优先，其次使用环境变量 S2_API_KEY；都没有时返回 None (匿名访问)。"""
+    return (settings or {}).get('s2_api_key') or os.environ.get('S2_API_KEY') or None
+
+
+_shared_manager = None
+_shared_manager_lock = threading.Lock()
+
+
+def get_s2_client_manager():
+    """返回进程内共享的 Semantic Scholar 客户端管理器（首次调用时创建）。"""
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = S2ClientManager()
+            # 进程退出 (Web 应用或命令行结束) 时关闭连接池
+            atexit.register(_shared_manager.close)
+        return _shared_manager
+
+
+def get_s2_client(api_key=None):
+    """返回 api_key 对应的进程内共享、受令牌桶限流的 SemanticScholar 客户端。"""
+    return get_s2_client_manager().get_client(api_key)
@@ -1,16 +1,60 @@
 import time
 import argparse
-import pandas as pd
 import json
 from datetime import datetime
-from semanticscholar.SemanticScholar import SemanticScholar
-from openpyxl.utils import get_column_letter
-import requests # 确保导入 requests 库
 import re
 
 import subprocess
 import sys
 import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from response_cache import ResponseCache, get_response_cache
+from keyword_matcher import AbstractKeywordMatcher
+from venue_index import get_venue_index
+from s2_client import get_s2_client, resolve_s2_api_key
+from http_session import DOWNLOAD_POOL_SIZE, download_to_file, get_http_stats
+from paper_index import PaperIndex, get_paper_index
+from paper_record import S2SearchPaper, SemanticScholarRecord
+from report_export import (DEFAULT_EXPORT_FORMAT, EXPORT_FORMATS, SHEET_NAME_MAX_LENGTH, check_export_format,
+                           export_filename, safe_sheet_name, write_report)
+
+# 本地筛选时每处理多少篇论文报告一次进度
+PROGRESS_REPORT_INTERVAL = 200
+# 分片模式下同时执行的查询数量 (实际请求速率仍由共享的令牌桶限制)
+DEFAULT_MAX_CONCURRENT_SHARDS = 4
+# 分片工作线程与筛选之间的队列长度
+SHARD_QUEUE_SIZE = 1000
+# 非分片模式下后台翻页线程最多领先筛选的论文数量：筛选接近当前页末尾时才开始请求下一页，
+# 提前停止时最多多请求一页
+PREFETCH_QUEUE_SIZE = 100
+# 两阶段获取模式下每次批量获取详细字段的论文数量 (batch 接口的上限为 500)
+DETAIL_BATCH_SIZE = 500
+# 每积累多少篇论文提交一次本地索引写入
+INDEX_BATCH_SIZE = 1000
+# 每个主题最多从 API 获取的论文数量 (包括未通过筛选的论文)，防止开放式搜索遍历数万篇论文
+DEFAULT_MAX_FETCHED_PAPERS = 10000
+# 排序选项 -> bulk 搜索的 sort 参数。relevance 表示 API 默认顺序
+# (非 bulk 模式按相关度排序；bulk 模式不支持相关度，按 paperId 顺序返回)
+SORT_OPTIONS = {
+    'relevance': None,
+    'citations': 'citationCount:desc',
+    'recent': 'publicationDate:desc',
+}
+# 未指定排序时 bulk 搜索使用的排序：达到数量上限时保留引用数最高的论文，而不是按 paperId 截取的任意子集
+DEFAULT_BULK_SORT = 'citations'
+# 筛选流水线中会丢弃论文的阶段 (按执行顺序) -> 日志中显示的名称
+PIPELINE_STAGES = {
+    'duplicate': '重复',
+    'title': '标题排除词',
+    'year': '年份',
+    'venue': '会议/期刊',
+    'arxiv_citations': 'arXiv 引用数',
+    'details': '详细信息获取失败',
+    'abstract': '摘要关键词',
+}
 
 def auto_git_pull():
     """自动执行 git pull 更新代码"""
@@ -44,40 +88,331 @@ def find_top_venue(venue_str, venue_definitions):
     """
     根据venue字符串和指定的类别，判断论文是否属于顶级出版物。
     返回一个元组 (标准化的会议/期刊名称, 类别)，否则返回 (None, None)。
+    匹配通过预先构建的 VenueIndex 完成 (同一份会议定义只构建一次)。
     """
     if not venue_str or not venue_definitions:
         return None, None
 
-    venue_lower = venue_str.lower()
-    venue_lower = venue_lower.replace(",", "")
+    return get_venue_index(venue_definitions).lookup(venue_str)
 
-    # 将常规会议和可能的顶层特殊会议（如 arXiv）合并到一个列表中进行迭代
-    all_venues_to_check = []
-    if 'venues' in venue_definitions and isinstance(venue_definitions['venues'], dict):
-        all_venues_to_check.extend(venue_definitions['venues'].items())
-    
-    # 检查顶层是否也有需要检查的条目，例如 arXiv
-    for key, value in venue_definitions.items():
-        if key != 'venues' and isinstance(value, dict) and 'venue' in value:
-            all_venues_to_check.append((key, value))
-
-    # 在所有定义的会议中查找匹配项
-    for conf_name, conf_details in all_venues_to_check:
-        for pattern in conf_details.get('venue', []):
-            if pattern.lower() in venue_lower:
-                return conf_name, conf_details.get('category', 'Others')
-                
-    return None, None
-
-def search_semantic_scholar(topic, settings, venue_definitions, bulk_search):
+def _venue_definition(venue_definitions, venue_key):
+    """返回会议键对应的定义 ('venues' 下的常规会议或顶层的特殊条目，例如 arXiv)，找不到时返回 None。"""
+    venue_info = venue_definitions.get('venues', {}).get(venue_key)
+    if venue_info is None and venue_key != 'venues':
+        venue_info = venue_definitions.get(venue_key)
+    return venue_info if isinstance(venue_info, dict) and 'venue' in venue_info else None
+
+
+def _project_paper(paper):
+    """
+    把 semanticscholar 的 Paper 对象投影为只包含筛选和输出所需字段的紧凑记录 (S2SearchPaper)，
+    投影后不再保留 Paper 对象和其中的原始响应数据。
+    请求时没有包含的字段 (例如两阶段获取的第一阶段) 投影为 None。
+    """
+    def field(name):
+        # Paper 对象只设置了响应中出现的字段，访问其他字段会抛出 AttributeError
+        return getattr(paper, name, None)
+
+    external_ids = field('externalIds') or {}
+    return S2SearchPaper(
+        paperId=paper.paperId,
+        title=field('title'),
+        venue=field('venue'),
+        year=field('year'),
+        authors=[author['name'] for author in (field('authors') or [])],
+        citationCount=field('citationCount'),
+        abstract=field('abstract'),
+        url=field('url'),
+        arxiv_id=external_ids.get('ArXiv'),
+        doi=external_ids.get('DOI'),
+    )
+
+
+def _fetch_paper_details(s2, paper_ids, fields, use_cache=True):
+    """
+    通过 batch 接口获取一批论文的详细字段，返回 {paperId: 投影后的论文记录}。
+    结果按论文 ID 集合缓存；请求出错时打印错误并返回空字典 (这批论文视为未通过筛选)。
+    """
+    cache = get_response_cache() if use_cache else None
+    cache_key = ResponseCache.make_key('semantic_scholar', paper_ids=sorted(paper_ids), fields=fields)
+    cached = cache.get('semantic_scholar', cache_key) if cache else None
+    if cached is not None:
+        papers = [S2SearchPaper(**paper) for paper in cached]
+    else:
+        try:
+            papers = [_project_paper(paper) for paper in s2.get_papers(paper_ids, fields=fields)]
+        except Exception as e:
+            print(f"    ! 批量获取 {len(paper_ids)} 篇论文的详细信息时出错: {e}")
+            return {}
+        if cache:
+            cache.set('semantic_scholar', cache_key, [paper.to_dict() for paper in papers])
+    return {paper['paperId']: paper for paper in papers}
+
+
+def _index_row(paper):
+    """把投影后的论文记录转换为本地论文索引的一行 (摘要单独保存，不放进 payload)。"""
+    return {
+        'paper_id': paper['paperId'],
+        'title': paper['title'],
+        'abstract': paper['abstract'],
+        'venue': paper['venue'],
+        'year': paper['year'],
+        'authors': ", ".join(paper['authors']),
+        'payload': {field: value for field, value in paper.items() if field != 'abstract'},
+    }
+
+
+def _iter_indexed_papers(index, scope_key):
+    """离线模式的事件生成器：按登记顺序产出本地索引中该搜索范围内的论文。"""
+    for payload, has_abstract in index.iter_scope(scope_key):
+        # 摘要关键词已经在索引中匹配过，这里只需区分论文是否有摘要 (没有摘要的论文跳过摘要筛选)
+        payload['abstract'] = '' if has_abstract else None
+        yield 'paper', S2SearchPaper(**payload)
+    yield 'shard_done', None
+
+
+def _iter_search_papers(s2, query, venues, fields, fields_of_study, bulk, min_year, use_cache=True, label=None, max_year=None, sort=None,
+                        min_citation_count=None, errors=None):
+    """
+    执行一次 Semantic Scholar 搜索，边翻页边逐篇产出投影后的论文记录 (S2SearchPaper)。
+    min_year / max_year 为发表年份范围 (包含两端)，为 None 时不限制。
+    sort 为 bulk 搜索的排序参数 (见 SORT_OPTIONS)，调用方提前停止迭代时不会再请求后续页面。
+    min_citation_count 为 API 端的最低引用数过滤 (minCitationCount)，为 None 时不限制。
+    优先读取本地响应缓存，未命中时请求 API 并在完整获取后写回缓存。
+    请求出错时打印错误并停止产出，已产出的论文仍然有效，但不会写入缓存；
+    errors 为列表时同时把错误追加到其中，供调用方判断结果是否完整。
+    """
+    label = label or f"'{query}'"
+    cache = get_response_cache() if use_cache else None
+    cache_key = ResponseCache.make_key(
+        'semantic_scholar', query=query, venues=venues, fields=fields,
+        fields_of_study=fields_of_study, bulk=bulk, min_year=min_year, max_year=max_year, sort=sort,
+        min_citation_count=min_citation_count,
+    )
+    cached = cache.get('semantic_scholar', cache_key) if cache else None
+    if cached is not None:
+        print(f"    > 命中本地缓存 ({len(cached)} 篇)")
+        for paper in cached:
+            yield S2SearchPaper(**paper)
+        return
+
+    papers = []
+    try:
+        lazy_results = iter(s2.search_paper(
+            query=query,
+            venue=venues,
+            fields=fields,
+            fields_of_study=fields_of_study,
+            bulk=bulk,
+            sort=sort if bulk else None,
+            min_citation_count=min_citation_count,
+            publication_date_or_year=f"{min_year or ''}:{max_year or ''}" if (min_year or max_year) else None
+        ))
+    except Exception as e:
+        print(f"    ! 搜索 {label} 时出错: {e}")
+        if errors is not None:
+            errors.append(e)
+        return
+
+    while True:
+        # 只对 API 翻页请求捕获异常，调用方在 yield 处抛出的异常 (例如任务取消) 会正常向上传递
+        try:
+            paper = next(lazy_results)
+        except StopIteration:
+            break
+        except Exception as e:
+            print(f"    ! 搜索 {label} 时出错: {e}")
+            if errors is not None:
+                errors.append(e)
+            return
+        projected = _project_paper(paper)
+        papers.append(projected)
+        yield projected
+
+    if cache:
+        cache.set('semantic_scholar', cache_key, [paper.to_dict() for paper in papers])
+
+
+def _iter_sequential_shards(search_plan, fetch_shard):
     """
-    实际执行搜索和初步筛选的函数。
+    依次执行搜索计划中的每个查询，产出事件 ('paper', 论文字典)，
+    每个查询结束后产出 ('shard_done', None)。
+    """
+    for plan_item in search_plan:
+        for paper in fetch_shard(plan_item):
+            yield 'paper', paper
+        yield 'shard_done', None
+
+
+def _iter_concurrent_shards(search_plan, fetch_shard, max_workers, queue_size=SHARD_QUEUE_SIZE):
+    """
+    并发执行搜索计划中的查询 (分片模式)，按到达顺序产出与 _iter_sequential_shards 相同的事件。
+    工作线程通过有界队列把论文交给调用方，调用方处理不过来时工作线程会暂停翻页；
+    调用方停止迭代或抛出异常时，所有分片在下一篇论文处停止。
+    max_workers 为 1 时按计划顺序执行，相当于在后台线程中预取下一页，使翻页与调用方的筛选重叠。
+    工作线程中的异常 (API 请求以外的错误，例如投影或写入缓存出错) 通过队列传回，在调用方线程中重新抛出。
+    """
+    results = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(plan_item):
+        papers = None
+        try:
+            papers = fetch_shard(plan_item)
+            for paper in papers:
+                if not put(('paper', paper)):
+                    return
+        except Exception as e:
+            put(('shard_error', e))
+            raise
+        finally:
+            if papers is not None:
+                papers.close()
+            put(('shard_done', None))
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='s2-shard')
+    try:
+        futures = [executor.submit(run, plan_item) for plan_item in search_plan]
+        remaining = len(search_plan)
+        while remaining:
+            event, paper = results.get()
+            if event == 'shard_error':
+                raise paper
+            if event == 'shard_done':
+                remaining -= 1
+            yield event, paper
+        for future in futures:
+            future.result()
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+# --- 筛选流水线 ---
+# 每个阶段是一个生成器，输入和输出都是 (事件, 数据) 事件流：('paper', 数据) 为一篇论文，
+# 其他事件 (shard_done / tick / max_fetched) 是控制事件，各阶段原样传递。
+# 阶段丢弃论文时在 stats[阶段名称] 中计数。
+
+def _dedup_stage(events, stats, max_fetched=None):
+    """
+    流水线的第一个阶段：按 paperId 去重，并把获取的论文数计入 stats['fetched']。
+    每产出 PROGRESS_REPORT_INTERVAL 篇独立论文插入一个 ('tick', 独立论文数) 事件，供调用方报告进度；
+    独立论文达到 max_fetched 篇时产出 ('max_fetched', 独立论文数) 并停止。
+    """
+    seen_ids = set()
+    for event, paper in events:
+        if event != 'paper':
+            yield event, paper
+            continue
+        stats['fetched'] += 1
+        if paper['paperId'] in seen_ids:
+            stats['duplicate'] += 1
+            continue
+        seen_ids.add(paper['paperId'])
+        yield event, paper
+        if len(seen_ids) % PROGRESS_REPORT_INTERVAL == 0:
+            yield 'tick', len(seen_ids)
+        if max_fetched is not None and len(seen_ids) >= max_fetched:
+            yield 'max_fetched', len(seen_ids)
+            return
+
+
+def _filter_stage(events, stats, stage, func):
+    """
+    通用的筛选阶段：对每篇论文调用 func，返回 None 时丢弃该论文并计入 stats[stage]，
+    否则把返回值作为该论文交给下一个阶段 (可以附加信息，例如匹配到的会议)。
+    """
+    for event, item in events:
+        if event == 'paper':
+            item = func(item)
+            if item is None:
+                stats[stage] += 1
+                continue
+        yield event, item
+
+
+def _tap_stage(events, func):
+    """对每篇论文调用 func (例如写入本地索引)，不改变事件流。"""
+    for event, item in events:
+        if event == 'paper':
+            func(item)
+        yield event, item
+
+
+def _detail_stage(events, stats, fetch_details, batch_size, search_fields):
+    """
+    两阶段获取模式的批量获取阶段：积累 (论文, 会议信息) 直到 batch_size() 篇，或一个查询结束 (shard_done)、
+    事件流结束时，通过 fetch_details(论文 ID 列表) 一次获取这批论文的详细字段，
+    合并到论文中搜索时没有请求的字段 (search_fields 以外)。没有获取到详细字段的论文丢弃并计入 stats['details']。
+    """
+    pending = []
+
+    def complete():
+        details = fetch_details([paper['paperId'] for paper, _ in pending])
+        batch = pending[:]
+        pending.clear()
+        for paper, venue in batch:
+            detail = details.get(paper['paperId'])
+            if detail is None:
+                stats['details'] += 1
+                continue
+            paper.update((field, value) for field, value in detail.items() if field not in search_fields)
+            yield 'paper', (paper, venue)
+
+    for event, item in events:
+        if event == 'paper':
+            pending.append(item)
+            if len(pending) >= batch_size():
+                yield from complete()
+            continue
+        if event == 'shard_done' and pending:
+            # 每个查询结束时处理剩余的论文，使结果尽早产出
+            yield from complete()
+        yield event, item
+    if pending:
+        yield from complete()
+
+
+def iter_semantic_scholar_papers(topic, settings, venue_definitions, bulk_search, progress=None):
+    """
+    实际执行搜索和初步筛选的生成器。
+    一边翻页获取一边在本地筛选，每篇论文通过会议和摘要筛选后立即产出，不等待全部请求完成。
+    筛选由一串生成器阶段组成 (去重、标题、年份、会议、arXiv 引用数、摘要，见 PIPELINE_STAGES)，
+    非分片模式下翻页在后台线程中进行 (settings['prefetch_pages'] 为 False 时在当前线程中进行)，
+    结束时打印并通过 progress 报告 (stages) 每个阶段丢弃的论文数量。
+    progress 为可选的回调，在获取和筛选过程中以字典形式报告阶段、计数和新通过筛选的论文。
+    通过筛选的论文达到 settings['limit_per_topic'] 篇，或从 API 获取的论文达到
+    settings['max_fetched_papers'] 篇时停止翻页；settings['sort'] 决定 bulk 搜索时优先获取哪些论文
+    (未指定时 bulk 搜索按引用数排序，非 bulk 搜索按相关度排序)。
+    获取到的论文会写入本地论文索引 (见 paper_index)；settings['offline'] 为 True 时不请求 API，
+    而是在索引中同一搜索 (查询关键词、会议、年份、模式相同) 获取过的论文上重新执行全部本地筛选。
     """
     direction = topic.get('direction', 'Unnamed Direction')
     print(f"[{direction}] 开始搜索...")
 
     # --- 参数准备 ---
     min_year = settings.get('min_year', 2020)
+    use_cache = settings.get('use_cache', True)
+    # 结果预算: 0 或 None 表示不限制
+    limit = settings.get('limit_per_topic') or None
+    max_fetched = settings.get('max_fetched_papers', DEFAULT_MAX_FETCHED_PAPERS) or None
+    sort_option = settings.get('sort') or (DEFAULT_BULK_SORT if bulk_search else 'relevance')
+    if sort_option not in SORT_OPTIONS:
+        print(f"    ! 未知的排序选项 '{sort_option}'，将使用 API 默认顺序。")
+    sort = SORT_OPTIONS.get(sort_option) if bulk_search else None
+    if sort_option != 'relevance' and not bulk_search:
+        print(f"    ! 非 Bulk 搜索模式只支持按相关度排序，排序选项 '{sort_option}' 被忽略。")
+    if bulk_search and sort is None and (limit or max_fetched):
+        print("    ! Bulk 搜索模式不支持按相关度排序 (按 paperId 顺序返回)，达到数量上限时保留的是任意一部分论文。")
 
     # 准备要搜索的会议 (venues_to_search_keys) 和 API venue 列表 (api_venue_list)
     venues_to_search_keys = []
@@ -91,9 +426,10 @@ def search_semantic_scholar(topic, settings, venue_definitions, bulk_search):
         venues_to_search_keys = user_specified_venue_keys
         print(f"  > 用户为此搜索批次指定了 {len(venues_to_search_keys)} 个会议/期刊。")
         for key in venues_to_search_keys:
-            # 在新的 'venues' 对象中查找常规会议
-            if 'venues' in venue_definitions and key in venue_definitions['venues']:
-                api_venue_list.extend(venue_definitions['venues'][key]['venue'])
+            # 在新的 'venues' 对象中查找常规会议，以及顶层的特殊条目 (例如 arXiv)
+            venue_info = _venue_definition(venue_definitions, key)
+            if venue_info:
+                api_venue_list.extend(venue_info['venue'])
             else:
                 print(f"    ! 警告: 在定义中找不到指定的 venue_key '{key}'。")
     # 如果用户未指定任何会议，则默认使用 default.json 中 'venues' 下的所有会议
@@ -123,30 +459,56 @@ def search_semantic_scholar(topic, settings, venue_definitions, bulk_search):
     if not title_exclude_keywords:
         title_exclude_keywords = venue_definitions.get('default_title_exclude_keywords', [])
         
+    # arXiv 论文的最低引用数: 在初筛阶段 (摘要筛选之前) 应用，
+    # 并在只包含 arXiv 的查询中下推为 API 的 minCitationCount 参数
+    min_arxiv_citations = settings.get('min_arxiv_citations')
+    if min_arxiv_citations is None:
+        min_arxiv_citations = venue_definitions.get('default_min_arxiv_citations', 0)
+    arxiv_info = _venue_definition(venue_definitions, 'arXiv')
+    arxiv_api_names = set(arxiv_info['venue']) if arxiv_info else set()
+
     fields_of_study = ["Computer Science", "Engineering"]
 
     if not api_venue_list:
         print(f"警告：在 '{direction}' 方向中，指定的 'venues_to_search' 列表为空或无效，将不会按场馆筛选。")
     
-    s2 = SemanticScholar()
-    all_results = {}
-    SEARCH_FIELDS = ['url', 'title', 'venue', 'year', 'authors', 'citationCount', 'abstract', 'paperId']
+    SEARCH_FIELDS = ['url', 'title', 'venue', 'year', 'authors', 'citationCount', 'abstract', 'paperId', 'externalIds']
+    # 两阶段获取模式: 搜索时只请求初筛所需的少量字段，通过标题/年份/会议筛选的论文
+    # 再通过 batch 接口批量获取摘要和作者等字段 (摘要占响应的大部分)
+    offline = settings.get('offline', False)
+    two_phase_fetch = settings.get('two_phase_fetch', False) and not offline
+    LIGHT_SEARCH_FIELDS = ['paperId', 'title', 'venue', 'year', 'citationCount']
+    DETAIL_FIELDS = ['paperId', 'url', 'authors', 'abstract', 'externalIds']
+
+    # 分片模式 (仅 bulk): 按会议和/或年份拆分为多个查询并发执行，由共享的令牌桶限流
+    shard_by_venue = bulk_search and settings.get('shard_by_venue', False)
+    shard_by_year = bulk_search and settings.get('shard_by_year', False) and bool(min_year)
 
+    # 搜索计划: 每一项为 (查询字符串, API venue 列表, (起始年份, 结束年份), 出错时显示的描述, 开始搜索时打印的日志)
+    search_plan = []
     if bulk_search:
         print("  > 正在执行 Bulk 搜索模式...")
 
         # 1. 准备会议循环列表 (venues_loop_list)
-        #    - 用户指定的会议将被合并进行一次搜索
+        #    - 默认将所有目标会议合并进行一次搜索；分片模式下每个会议单独搜索
         venues_loop_list = []
         user_specified_venues = 'venues_to_search' in topic and bool(topic['venues_to_search'])
         
-        # 在 bulk 模式下，总是将所有目标会议合并到一次请求中
-        if user_specified_venues:
-            # print(f"  > 将对指定的 {len(venues_to_search_keys)} 个会议进行独立搜索。")
-            # for venue_key in venues_to_search_keys:
-            #     venue_info = venue_definitions.get('venues', {}).get(venue_key)
-            #     api_names = venue_info['venue'] if venue_info and 'venue' in venue_info else [venue_key]
-            #     venues_loop_list.append({'display_name': venue_key, 'api_names': api_names})
+        if shard_by_venue:
+            print(f"  > 分片模式: 将对 {len(venues_to_search_keys)} 个会议/期刊分别进行搜索。")
+            for venue_key in venues_to_search_keys:
+                venue_info = _venue_definition(venue_definitions, venue_key)
+                if venue_info:
+                    venues_loop_list.append({'display_name': venue_key, 'api_names': venue_info['venue']})
+        elif user_specified_venues and min_arxiv_citations and arxiv_info \
+                and 'arXiv' in venues_to_search_keys and len(venues_to_search_keys) > 1:
+            # arXiv 的结果数量远多于其他会议，单独查询以便把最低引用数下推到 API
+            other_keys = [key for key in venues_to_search_keys if key != 'arXiv']
+            print(f"  > 用户指定了 {len(venues_to_search_keys)} 个会议/期刊，arXiv 单独搜索 (最低引用数 {min_arxiv_citations})，其余合并搜索。")
+            venues_loop_list.append({'display_name': ', '.join(other_keys),
+                                     'api_names': [name for name in api_venue_list if name not in arxiv_api_names]})
+            venues_loop_list.append({'display_name': 'arXiv', 'api_names': arxiv_info['venue']})
+        elif user_specified_venues:
             print(f"  > 用户指定了 {len(venues_to_search_keys)} 个会议/期刊，将在一次请求中合并搜索。")
             venues_loop_list.append({'display_name': ', '.join(venues_to_search_keys), 'api_names': api_venue_list})
         else:
@@ -156,7 +518,6 @@ def search_semantic_scholar(topic, settings, venue_definitions, bulk_search):
         # 2. 准备关键词循环列表 (query_loop_groups)
         #    - 如果用户提供了关键词, 就使用这些关键词组
         #    - 如果未提供, 列表只有一个元素, 即一个空查询组 [['']]
-        query_keyword_groups = topic.get('query_keywords', [])
         no_keywords_provided = not any(kw.strip() for group in query_keyword_groups for kw in group)
         
         query_loop_groups = query_keyword_groups if not no_keywords_provided else [['']]
@@ -168,143 +529,269 @@ def search_semantic_scholar(topic, settings, venue_definitions, bulk_search):
             query_loop_groups = [[combined_query]] # 创建一个新的只包含一个组合查询的列表
             print(f"  > 已将多个查询合并为: {combined_query}")
 
-        # 3. 执行统一的嵌套循环
+        # 3. 准备年份范围列表: 默认为 [min_year, 不限]；分片模式下每年一个范围，最后一个范围不设上限
+        year_ranges = [(min_year, None)]
+        if shard_by_year:
+            current_year = datetime.now().year
+            year_ranges = [(year, year) for year in range(min_year, current_year)] + [(max(min_year, current_year), None)]
+            print(f"  > 分片模式: 将按年份拆分为 {len(year_ranges)} 个范围。")
+
+        # 4. 展开为统一的搜索计划
         for venue_item in venues_loop_list:
             for group in query_loop_groups:
-                query = " ".join(group)
-                venue_display = venue_item['display_name']
-
-                log_message = f"  > 正在开放式搜索 @ '{venue_display}'" if not query else f"  > 正在搜索: '{query}' @ '{venue_display}'"
-                print(log_message)
-
-                try:
-                    lazy_results = s2.search_paper(
-                        query=query,
-                        venue=venue_item['api_names'],
-                        fields=SEARCH_FIELDS,
-                        fields_of_study=fields_of_study,
-                        bulk=True,
-                        publication_date_or_year=f"{min_year}:"
-                    )
-                    for paper in lazy_results:
-                        if paper.paperId not in all_results:
-                            all_results[paper.paperId] = paper
-                            # print(paper.venue, paper.title)
-                except Exception as e:
-                    print(f"    ! 搜索 '{query}' @ '{venue_display}' 时出错: {e}")
+                for year_range in year_ranges:
+                    query = " ".join(group)
+                    venue_display = venue_item['display_name']
+                    if len(year_ranges) > 1:
+                        venue_display += f" ({year_range[0]}-{year_range[1] or ''})"
+
+                    log_message = f"  > 正在开放式搜索 @ '{venue_display}'" if not query else f"  > 正在搜索: '{query}' @ '{venue_display}'"
+                    search_plan.append((query, venue_item['api_names'], year_range, f"'{query}' @ '{venue_display}'", log_message))
 
     else:  # bulk_search is False
         print("  > 正在执行非 Bulk (高精度) 搜索模式...")
 
         # 1. 在此模式下, 必须提供关键词
-        query_keyword_groups = topic.get('query_keywords', [])
         if not any(kw.strip() for group in query_keyword_groups for kw in group):
             print(f"    ! 配置错误: 非 Bulk 搜索模式 (bulk=false) 必须提供查询关键词。")
             print(f"    ! [{direction}] 此搜索方向已被跳过。")
-            return []
+            return
 
         # 2. 对每个关键词组进行搜索 (总是合并所有会议)
         for group in query_keyword_groups:
             query = " ".join(group)
             if not query: continue
-            print(f"  > 正在搜索: '{query}'")
-            
-            try:
-                lazy_results = s2.search_paper(
-                    query=query,
-                    venue=api_venue_list,
-                    fields=SEARCH_FIELDS,
-                    fields_of_study=fields_of_study,
-                    bulk=False,
-                    publication_date_or_year=f"{min_year}:"
-                )
-                for paper in lazy_results:
-                    if paper.paperId not in all_results:
-                        all_results[paper.paperId] = paper
-            except Exception as e:
-                print(f"    ! 搜索 '{query}' 时出错: {e}")
+            search_plan.append((query, api_venue_list, (min_year, None), f"'{query}'", f"  > 正在搜索: '{query}'"))
+
+    abstract_matcher = AbstractKeywordMatcher(abstract_keyword_groups)
+
+    # 本地论文索引的搜索范围只由决定获取哪些论文的参数确定 (包括下推到 API 的排序和最低引用数)，
+    # 修改其他筛选条件后仍能离线重新筛选
+    index = get_paper_index() if (offline or settings.get('index_papers', True)) else None
+    scope_key = PaperIndex.make_scope_key(
+        'semantic_scholar', query_keywords=query_keyword_groups, venues=venues_to_search_keys,
+        min_year=min_year, bulk=bulk_search, sort=sort, min_arxiv_citations=min_arxiv_citations,
+    )
+    abstract_matches = None
+    if offline:
+        if not index.has_scope(scope_key):
+            raise ValueError("本地索引中没有该搜索的结果，请先在线执行一次相同的搜索。")
+        if not index.is_complete_scope(scope_key):
+            # 两阶段获取模式只登记了通过初筛的论文，提前停止或请求出错的搜索只登记了部分论文，
+            # 修改筛选条件后重新筛选的结果会不完整
+            raise ValueError("本地索引中该搜索的结果不完整 (两阶段获取、达到数量上限提前停止或请求出错)，"
+                             "无法离线重新筛选；请关闭两阶段获取并取消数量上限，在线完整执行一次相同的搜索。")
+        abstract_matches = index.match_abstracts(abstract_keyword_groups, scope_key)
 
-    print(f"[{direction}] API 请求完成，共获得 {len(all_results)} 篇独立论文，开始本地筛选...")
+    # --- 筛选条件 (流水线各阶段，按代价从低到高排列) ---
+    title_exclude_lower = [kw.lower() for kw in title_exclude_keywords or []]
 
-    # --- 本地筛选 ---
-    top_papers = []
-    for paper in all_results.values():
+    def title_ok(paper):
         # 标题屏蔽筛选
-        title_lower = paper.title.lower()
-        if title_exclude_keywords and any(kw.lower() in title_lower for kw in title_exclude_keywords):
-            continue
-        
+        title_lower = paper['title'].lower()
+        return None if any(kw in title_lower for kw in title_exclude_lower) else paper
+
+    def year_ok(paper):
         # 年份筛选
-        if min_year and (not paper.year or paper.year < min_year):
-            continue
+        return None if min_year and (not paper['year'] or paper['year'] < min_year) else paper
 
-        # 会议/期刊筛选 (现在同时返回分类)
-        found_venue, venue_category_name = find_top_venue(paper.venue, venue_definitions)
-        if not found_venue:
-            continue
+    def match_venue(paper):
+        # 会议/期刊筛选 (同时返回分类)，通过时附加 (会议/期刊名称, 类别)
+        found_venue, venue_category_name = find_top_venue(paper['venue'], venue_definitions)
+        return (paper, (found_venue, venue_category_name)) if found_venue else None
+
+    def arxiv_citations_ok(item):
+        # arXiv 论文的最低引用数筛选
+        paper, (found_venue, _) = item
+        if found_venue == 'arXiv' and min_arxiv_citations and (paper['citationCount'] or 0) < min_arxiv_citations:
+            return None
+        return item
 
+    def finish_paper(item):
+        """对通过初筛的论文做摘要筛选，通过时返回输出记录，否则返回 None。"""
+        paper, (found_venue, venue_category_name) = item
         # 摘要关键词筛选 (带有例外和匹配记录逻辑)
         matched_keywords_in_abstract = []
-        if found_venue in skip_abstract_venues or paper.abstract is None:
+        if found_venue in skip_abstract_venues or paper['abstract'] is None:
             # 如果命中了顶级会议，则跳过摘要筛选
             pass
-        elif abstract_keyword_groups:
-            # 否则，正常进行摘要筛选
-            abstract_lower = (paper.abstract or "").lower()
-            
-            for group in abstract_keyword_groups:
-                all_kws_in_group_matched = True
-                for kw in group:
-                    is_whole_word = kw.endswith('*')
-                    clean_kw = kw.rstrip('*').lower()
-                    
-                    if not clean_kw: continue
-
-                    if is_whole_word:
-                        # 全词匹配
-                        if not re.search(r'\b' + re.escape(clean_kw) + r'\b', abstract_lower):
-                            all_kws_in_group_matched = False
-                            break
-                    else:
-                        # 子字符串匹配
-                        if clean_kw not in abstract_lower:
-                            all_kws_in_group_matched = False
-                            break
-                
-                if all_kws_in_group_matched:
-                    matched_keywords_in_abstract.extend(group)
-            
+        elif abstract_matcher:
+            # 否则，正常进行摘要筛选 (离线模式下使用索引的匹配结果)
+            if abstract_matches is not None:
+                matched_keywords_in_abstract = abstract_matches.get(paper['paperId'], [])
+            else:
+                matched_keywords_in_abstract = abstract_matcher.match(paper['abstract'])
             if not matched_keywords_in_abstract:
-                continue
+                return None
         
-        top_papers.append({
-            'title': paper.title,
-            'matched_abstract_keywords': ", ".join(sorted(list(set(matched_keywords_in_abstract)))),
-            'venue_name': found_venue,
-            'category': venue_category_name,
-            'year': paper.year,
-            'url': paper.url,
-            'author': ", ".join([author['name'] for author in paper.authors]),
-            'citations': paper.citationCount,
-            'paperId': paper.paperId
-        })
-            
+        return SemanticScholarRecord(
+            title=paper['title'],
+            matched_keywords=", ".join(sorted(list(set(matched_keywords_in_abstract)))),
+            venue_name=found_venue,
+            category=venue_category_name,
+            year=paper['year'],
+            url=paper['url'],
+            author=", ".join(paper['authors']),
+            citations=paper['citationCount'],
+            paperId=paper['paperId'],
+            arxiv_id=paper['arxiv_id'],
+            doi=paper['doi'],
+        )
+
+    # --- 边获取边筛选 ---
+    s2 = get_s2_client(resolve_s2_api_key(settings))
+
+    search_fields = LIGHT_SEARCH_FIELDS if two_phase_fetch else SEARCH_FIELDS
+    if two_phase_fetch:
+        print(f"  > 两阶段获取: 搜索时只请求 {', '.join(LIGHT_SEARCH_FIELDS)}，初筛后再批量获取详细信息。")
+
+    # 在线获取时出现的 API 错误，出错的搜索结果不完整
+    fetch_errors = []
+
+    def fetch_shard(plan_item):
+        query, api_names, (start_year, end_year), label, log_message = plan_item
+        print(log_message)
+        # 查询只包含 arXiv 时，最低引用数可以直接交给 API 过滤
+        arxiv_only = bool(api_names) and set(api_names) <= arxiv_api_names
+        return _iter_search_papers(
+            s2, query, api_names, search_fields, fields_of_study,
+            bulk=bulk_search, min_year=start_year, max_year=end_year, use_cache=use_cache, label=label, sort=sort,
+            min_citation_count=(min_arxiv_citations or None) if arxiv_only else None, errors=fetch_errors,
+        )
+
+    if offline:
+        print(f"  > 离线模式: 在本地索引中重新筛选，不请求 API。")
+        source = _iter_indexed_papers(index, scope_key)
+    elif (shard_by_venue or shard_by_year) and len(search_plan) > 1:
+        max_workers = settings.get('max_concurrent_shards', DEFAULT_MAX_CONCURRENT_SHARDS)
+        print(f"  > 共 {len(search_plan)} 个分片，最多 {max_workers} 个并发执行。")
+        source = _iter_concurrent_shards(search_plan, fetch_shard, max_workers)
+    elif settings.get('prefetch_pages', True):
+        # 在后台线程中依次执行查询，翻页请求与本地筛选重叠
+        source = _iter_concurrent_shards(search_plan, fetch_shard, 1, queue_size=PREFETCH_QUEUE_SIZE)
+    else:
+        source = _iter_sequential_shards(search_plan, fetch_shard)
+
+    # 等待写入本地索引的论文 (离线模式下不写入)
+    index_rows = []
+
+    def flush_index():
+        if index is not None and not offline and index_rows:
+            index.add('semantic_scholar', index_rows[:], scope_key, description=direction)
+        index_rows.clear()
+
+    def index_paper(paper):
+        if index is not None and not offline:
+            index_rows.append(_index_row(paper))
+            if len(index_rows) >= INDEX_BATCH_SIZE:
+                flush_index()
+
+    detail_requests = 0
+
+    def fetch_details(paper_ids):
+        nonlocal detail_requests
+        detail_requests += 1
+        return _fetch_paper_details(s2, paper_ids, DETAIL_FIELDS, use_cache=use_cache)
+
+    def detail_batch_size():
+        # 剩余预算较小时不必凑满一批：待处理的论文全部通过筛选即可达到上限
+        return DETAIL_BATCH_SIZE if limit is None else min(DETAIL_BATCH_SIZE, limit - kept)
+
+    # 组装筛选流水线: 去重 -> 标题 -> 年份 -> 会议 -> arXiv 引用数 -> (两阶段: 批量获取详细信息) -> 摘要
+    stats = dict.fromkeys(['fetched', *PIPELINE_STAGES], 0)
+    pipeline = _dedup_stage(source, stats, max_fetched)
+    if not two_phase_fetch:
+        pipeline = _tap_stage(pipeline, index_paper)
+    pipeline = _filter_stage(pipeline, stats, 'title', title_ok)
+    pipeline = _filter_stage(pipeline, stats, 'year', year_ok)
+    pipeline = _filter_stage(pipeline, stats, 'venue', match_venue)
+    pipeline = _filter_stage(pipeline, stats, 'arxiv_citations', arxiv_citations_ok)
+    if two_phase_fetch:
+        pipeline = _detail_stage(pipeline, stats, fetch_details, detail_batch_size, LIGHT_SEARCH_FIELDS)
+        # 两阶段模式只有获取了摘要的论文才写入索引
+        pipeline = _tap_stage(pipeline, lambda item: index_paper(item[0]))
+    pipeline = _filter_stage(pipeline, stats, 'abstract', finish_paper)
+
+    def unique_count():
+        return stats['fetched'] - stats['duplicate']
+
+    unreported = []
+    kept = 0
+    stop_reason = None
+    try:
+        for event, record in pipeline:
+            if event == 'paper':
+                kept += 1
+                unreported.append(record)
+                yield record
+                if limit is not None and kept >= limit:
+                    stop_reason = f"通过筛选的论文达到上限 {limit} 篇"
+                    break
+            elif event == 'max_fetched':
+                # 两阶段模式下等待中的论文仍会完成筛选
+                stop_reason = f"已获取的论文达到上限 {max_fetched} 篇"
+            elif progress and event == 'shard_done':
+                progress({'phase': 'fetching', 'fetched': unique_count()})
+            elif progress and event == 'tick':
+                progress({'phase': 'filtering', 'filtered': unique_count(), 'kept': kept, 'new_papers': unreported})
+                unreported = []
+    finally:
+        # 提前停止时关闭流水线和事件源，不再请求后续页面 (后台翻页线程和并发分片同时停止)
+        pipeline.close()
+        source.close()
+        flush_index()
+
+    if index is not None and not offline and not two_phase_fetch and stop_reason is None and not fetch_errors:
+        # 完整获取了搜索条件下的全部论文，在最后一批写入后把范围标记为完整
+        index.mark_complete(scope_key, 'semantic_scholar', description=direction)
+
+    if stop_reason:
+        print(f"[{direction}] {stop_reason}，已提前停止搜索。")
+    print(f"[{direction}] API 请求完成，共获得 {unique_count()} 篇独立论文，其中 {kept} 篇通过筛选。")
+    dropped = ", ".join(f"{label} {stats[stage]}" for stage, label in PIPELINE_STAGES.items() if stats[stage])
+    print(f"  > 各阶段丢弃的论文: {dropped or '无'}")
+    if two_phase_fetch:
+        print(f"  > 两阶段获取: 共发出 {detail_requests} 次批量详细信息请求。")
+    if progress:
+        progress({'phase': 'filtering', 'filtered': unique_count(), 'kept': kept, 'new_papers': unreported,
+                  'stages': stats})
+
+
+def search_semantic_scholar(topic, settings, venue_definitions, bulk_search, progress=None):
+    """
+    执行搜索和初步筛选，返回按会议、年份、引用数排序的完整论文列表。
+    需要逐篇获取结果时请使用 iter_semantic_scholar_papers。
+    """
+    top_papers = list(iter_semantic_scholar_papers(topic, settings, venue_definitions, bulk_search, progress=progress))
+
     # --- 本地排序 ---
     # 使用默认排序（会议、年份、引用数）
     top_papers.sort(key=lambda p: (p['venue_name'], -p.get('year', 0), -p.get('citations', 0)))
             
     return top_papers
 
-def run_search(topic, settings, venue_definitions):
+def run_search(topic, settings, venue_definitions, progress=None):
     """
     可从外部调用的搜索函数。
     它接收一个搜索主题和设置，返回论文列表。
+    progress 为可选的进度回调 (见 iter_semantic_scholar_papers)。
     """
     bulk_search = settings.get('bulk_search', True)
     venues_to_search_str = ', '.join(topic.get('venues_to_search', [])) or '所有会议'
     mode_str = "批量" if bulk_search else "高精度"
     print(f"--- 在 {mode_str} 模式下开始搜索: {venues_to_search_str} ---")
-    return search_semantic_scholar(topic, settings, venue_definitions, bulk_search=bulk_search)
+    return search_semantic_scholar(topic, settings, venue_definitions, bulk_search=bulk_search, progress=progress)
+
+def iter_search(topic, settings, venue_definitions, progress=None):
+    """
+    run_search 的流式版本：不排序，每篇论文通过筛选后立即产出。
+    供 Web 界面的流式接口使用，以便尽快展示第一批结果。
+    """
+    bulk_search = settings.get('bulk_search', True)
+    venues_to_search_str = ', '.join(topic.get('venues_to_search', [])) or '所有会议'
+    mode_str = "批量" if bulk_search else "高精度"
+    print(f"--- 在 {mode_str} 模式下开始流式搜索: {venues_to_search_str} ---")
+    return iter_semantic_scholar_papers(topic, settings, venue_definitions, bulk_search=bulk_search, progress=progress)
 
 
 def _generate_safe_filename(paper):
@@ -320,33 +807,67 @@ def _generate_safe_filename(paper):
     return f"[{venue_name} {year}] {safe_title}"
 
 
-def download_papers(grouped_papers, base_download_dir):
+def download_papers(grouped_papers, base_download_dir, progress=None, store_manifest=None):
     """
     尝试从 arXiv 并行下载给定论文分组字典的 PDF 文件。
     论文会根据分组的键（如类别或搜索方向）被保存在不同的子文件夹中。
     返回一个成功下载的文件名列表 (不含路径)。
+    没有 PDF 链接的论文会先使用其 arXiv ID，没有 ID 时通过 arxiv_resolver 按标题批量查找。
+    所有能确定 arXiv ID 或 DOI 的 PDF 都会保存到本地 PDF 存储 (见 pdf_store)，已存储的论文不再访问网络，
+    下载目录中的文件为指向存储的硬链接或副本。
+    如果传入 store_manifest 字典，来自 PDF 存储的论文不会放入下载目录，
+    而是记录为 {相对 base_download_dir 的路径: 存储中的文件路径}，由调用方 (例如打包 ZIP 时) 直接读取。
+    progress 为可选的回调，每处理完一篇论文调用一次，参数为包含 completed/total/successful 的字典；
+    回调抛出异常 (例如任务被取消) 时，尚未开始下载的论文会被跳过，等正在进行的下载结束后该异常继续向上抛出。
     """
-    import arxiv
     import re
-    from difflib import SequenceMatcher
     from concurrent.futures import ThreadPoolExecutor, as_completed
     import math
     import os
+    import threading
+    from pdf_store import get_pdf_store, paper_pdf_key
+    from arxiv_resolver import resolve_arxiv_ids, arxiv_pdf_url
 
-    SIMILARITY_THRESHOLD = 0.8
+    pdf_store = get_pdf_store()
     
-    # 准备一个扁平化的列表，其中每个元素都包含论文及其分组键
+    # 准备一个扁平化的列表，其中每个元素都包含论文 (副本，下面会补充 arxiv_id/pdf_url) 及其分组键
     all_papers_to_process = []
     for group_key, papers in grouped_papers.items():
         for paper in papers:
-            all_papers_to_process.append({'group': group_key, 'paper_data': paper})
+            all_papers_to_process.append({'group': group_key, 'paper_data': dict(paper)})
     
     num_papers = len(all_papers_to_process)
     if not num_papers:
         print("\n没有需要下载的论文。")
         return []
 
-    max_workers = min(max(1, math.ceil(num_papers / 4)), 16)
+    # --- arXiv ID 解析 ---
+    # 已知 arXiv ID 的论文 (例如 Semantic Scholar 返回的 externalIds) 直接构造 PDF 链接；
+    # 其余既没有 PDF 链接、也不在本地 PDF 存储中的论文，按标题批量查找对应的 arXiv 版本。
+    # PDF 存储键在解析之前确定 (只有 DOI 的论文使用 DOI 键)，下载后按同一个键保存，
+    # 下次会话不需要再次解析即可在存储中找到
+    unresolved = []
+    for paper_info in all_papers_to_process:
+        paper = paper_info['paper_data']
+        paper_info['store_key'] = paper_pdf_key(paper)
+        if paper.get('pdf_url'):
+            continue
+        if paper.get('arxiv_id'):
+            paper['pdf_url'] = arxiv_pdf_url(paper['arxiv_id'])
+            continue
+        store_key = paper_info['store_key']
+        if paper.get('title') and not (store_key and pdf_store.lookup(store_key)):
+            unresolved.append(paper)
+
+    if unresolved:
+        if progress:
+            progress({'phase': 'resolving', 'total': num_papers, 'unresolved': len(unresolved)})
+        for paper, arxiv_id in zip(unresolved, resolve_arxiv_ids(unresolved)):
+            if arxiv_id:
+                paper['arxiv_id'] = arxiv_id
+                paper['pdf_url'] = arxiv_pdf_url(arxiv_id)
+
+    max_workers = min(max(1, math.ceil(num_papers / 4)), DOWNLOAD_POOL_SIZE)
     print(f"\n--- 开始并行下载 {num_papers} 篇论文 (使用 {max_workers} 个线程) ---")
 
     def _fetch_and_download(paper_info):
@@ -354,12 +875,13 @@ def download_papers(grouped_papers, base_download_dir):
         处理单篇论文的下载逻辑。
         成功时返回最终的文件名(不含路径)，失败时返回 None。
         """
+        if stop_event.is_set():
+            return None
         paper = paper_info['paper_data']
         group_key = paper_info['group']
         pdf_url = paper.get('pdf_url')
 
         original_title = paper.get('title', '')
-        first_author = (paper.get('author') or paper.get('作者', '')).split(',')[0].strip()
 
         if not original_title:
             return None
@@ -374,63 +896,55 @@ def download_papers(grouped_papers, base_download_dir):
         full_filename = f"{base_filename}.pdf"
         filepath = os.path.join(category_dir, full_filename)
 
+        def place_stored_pdf(stored_path):
+            """把 PDF 存储中的文件放到下载目录 (或记录到 store_manifest)。"""
+            if store_manifest is not None:
+                store_manifest[os.path.relpath(filepath, base_download_dir)] = stored_path
+            else:
+                pdf_store.link_into(stored_path, filepath)
+            return full_filename
+
         # --- 智能下载逻辑 ---
-        # 策略1: 如果有直接的 PDF URL (来自 arXiv 搜索结果)
+        # 策略0: 本地 PDF 存储中已经有这篇论文 (按解析前的键，或解析出的 arXiv ID 对应的键)
+        store_key = paper_info['store_key']
+        for key in dict.fromkeys(filter(None, (store_key, paper_pdf_key(paper)))):
+            stored_path = pdf_store.lookup(key)
+            if stored_path:
+                return place_stored_pdf(stored_path)
+
+        # 策略1: 如果有 PDF URL (来自 arXiv 搜索结果，或上面解析出的 arXiv ID)
         if pdf_url:
             try:
-                response = requests.get(pdf_url, stream=True, timeout=10)
-                response.raise_for_status()
-                with open(filepath, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
+                if store_key:
+                    return place_stored_pdf(pdf_store.fetch(store_key, pdf_url))
+                download_to_file(pdf_url, filepath)
                 return full_filename
             except Exception as e:
-                # 如果直接下载失败，可以考虑打印一个警告，但目前选择静默失败并继续尝试搜索
                 print(f"  ! 直接从 URL '{pdf_url}' 下载失败: {e}")
-                pass
-        
-        # 策略2: 如果没有直接 URL 或直接下载失败，则回退到在 arXiv 上搜索 (来自 Semantic Scholar 的结果)
-        if not first_author:
-             return None # 没有作者信息无法进行搜索
-
-        client = arxiv.Client()
-        def perform_search_and_download(arxiv_paper, success_message):
-            arxiv_paper.download_pdf(dirpath=category_dir, filename=full_filename)
-            return full_filename
-
-        try:
-            # 搜索策略 A：作者 + 完整标题
-            query1 = f'au:"{first_author}" AND ti:"{original_title}"'
-            search1 = arxiv.Search(query=query1, max_results=1, sort_by=arxiv.SortCriterion.Relevance)
-            results1 = list(client.results(search1))
-            if results1 and SequenceMatcher(None, original_title.lower(), results1[0].title.lower()).ratio() >= SIMILARITY_THRESHOLD:
-                return perform_search_and_download(results1[0], "[成功]")
-        except Exception:
-            pass
 
-        # 搜索策略 B：如果标题包含冒号，尝试使用主标题
-        if ':' in original_title:
-            try:
-                main_title = original_title.split(':')[0].strip()
-                query2 = f'au:"{first_author}" AND ti:"{main_title}"'
-                search2 = arxiv.Search(query=query2, max_results=1, sort_by=arxiv.SortCriterion.Relevance)
-                results2 = list(client.results(search2))
-                if results2 and SequenceMatcher(None, original_title.lower(), results2[0].title.lower()).ratio() >= SIMILARITY_THRESHOLD:
-                    return perform_search_and_download(results2[0], "[成功-主标题]")
-            except Exception:
-                pass
-        
         return None
 
+    stop_event = threading.Event()
     successful_downloads = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
         future_to_paper = {executor.submit(_fetch_and_download, paper_info): paper_info for paper_info in all_papers_to_process}
-        for future in as_completed(future_to_paper):
+        for completed, future in enumerate(as_completed(future_to_paper), 1):
             result = future.result()
             if result:
                 successful_downloads.append(result)
+            if progress:
+                progress({'phase': 'downloading', 'completed': completed, 'total': num_papers,
+                          'successful': len(successful_downloads)})
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
     
+    http_stats = get_http_stats().snapshot()
     print(f"\n下载完成，共成功下载 {len(successful_downloads)} / {len(all_papers_to_process)} 篇论文。")
+    print(f"  > 累计 HTTP 请求 {http_stats['requests']} 次 (失败 {http_stats['failures']} 次)，下载 {http_stats['bytes'] / 1024 / 1024:.1f} MB")
+    for host, host_stats in http_stats['hosts'].items():
+        print(f"    - {host}: {host_stats['requests']} 次，平均延迟 {host_stats['avg_latency']:.2f} 秒，最大 {host_stats['max_latency']:.2f} 秒")
     return successful_downloads
 
 
@@ -439,6 +953,7 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="从 Semantic Scholar 批量搜索论文并导出到 Excel。")
     parser.add_argument("config", type=str, help="要使用的JSON配置文件路径 (例如 'config_algorithm.json')。")
     parser.add_argument("--venues", type=str, default="configs/semantic_scholar_default.json", help="包含会议/期刊定义的JSON文件路径。")
+    parser.add_argument("--format", type=str, choices=list(EXPORT_FORMATS), help="导出格式，覆盖配置文件中的 output_format (默认 xlsx)。")
     args = parser.parse_args()
 
     total_start_time = time.time()
@@ -480,60 +995,40 @@ if __name__ == "__main__":
         print("-" * 20)
 
     date_str = datetime.now().strftime('%Y%m%d')
-    output_file = f"{output_prefix}_{date_str}.xlsx"
+    output_format = check_export_format(args.format or config.get('output_format', DEFAULT_EXPORT_FORMAT))
+    output_file = export_filename(f"{output_prefix}_{date_str}", output_format)
 
     print(f"\n搜索完成，共找到 {total_papers_found} 篇符合所有条件的论文。")
     if papers_by_direction:
-        # 导出为 Excel
-        with pd.ExcelWriter(output_file, engine='openpyxl') as writer:
-            for direction, papers in sorted(papers_by_direction.items()):
-                print(f"方向 '{direction}' 找到 {len(papers)} 篇论文。")
-                if not papers:
-                    continue
-                
-                df = pd.DataFrame(papers)
-
-                # 按 'category' 列对论文进行分组
-                # 如果 'category' 列不存在，则默认所有论文都属于 'Others'
-                if 'category' not in df.columns:
-                    df['category'] = 'Others'
-                
-                grouped = df.groupby('category')
-
-                for category_name, group_df in grouped:
-                    # 准备用于输出的DataFrame，并确保列的顺序
-                    df_for_excel = pd.DataFrame({
-                        '会议/期刊': group_df['venue_name'],
-                        '年份': group_df['year'],
-                        '文章标题': group_df['title'],
-                        '匹配的摘要词': group_df['matched_abstract_keywords'],
-                        '作者': group_df['author'],
-                        '引用数': group_df['citations'],
-                        'URL': group_df['url']
-                    })
-
-                    # 创建安全且有意义的工作表名称
-                    safe_direction = "".join(c for c in direction if c.isalnum() or c in (' ', '_')).rstrip()
-                    safe_category = "".join(c for c in category_name if c.isalnum() or c in (' ', '_')).rstrip()
-                    sheet_name = f"{safe_direction} - {safe_category}"[:31]
-
-                    print(f"  > 正在写入工作表 '{sheet_name}' ({len(group_df)} 篇)")
-                    df_for_excel.to_excel(writer, sheet_name=sheet_name, index=False)
-                    
-                    # --- 新增：为每个工作表自动调整列宽 ---
-                    worksheet = writer.sheets[sheet_name]
-                    for idx, col in enumerate(df_for_excel, 1):
-                        series = df_for_excel[col]
-                        try:
-                            max_len = max(
-                                series.astype(str).map(len).max(),
-                                len(str(series.name))
-                            ) + 4
-                        except (ValueError, TypeError):
-                            max_len = len(str(series.name)) + 4
-                        
-                        worksheet.column_dimensions[get_column_letter(idx)].width = max_len
-                    
+        # 导出为 Excel (或 --format 指定的格式，此时每个工作表成为一个分组)
+        columns = [
+            ('会议/期刊', 'venue_name'),
+            ('年份', 'year'),
+            ('文章标题', 'title'),
+            ('匹配的摘要词', 'matched_keywords'),
+            ('作者', 'author'),
+            ('引用数', 'citations'),
+            ('URL', 'url'),
+        ]
+        sheets = []
+        for direction, papers in sorted(papers_by_direction.items()):
+            print(f"方向 '{direction}' 找到 {len(papers)} 篇论文。")
+            if not papers:
+                continue
+
+            # 按 'category' 对论文进行分组 (没有分类的论文归入 'Others')，每个分类一个工作表
+            papers_by_category = {}
+            for paper in papers:
+                papers_by_category.setdefault(paper.get('category') or 'Others', []).append(paper)
+
+            for category_name, category_papers in sorted(papers_by_category.items()):
+                # 创建安全且有意义的工作表名称
+                sheet_name = f"{safe_sheet_name(direction)} - {safe_sheet_name(category_name)}"[:SHEET_NAME_MAX_LENGTH]
+
+                print(f"  > 正在写入工作表 '{sheet_name}' ({len(category_papers)} 篇)")
+                sheets.append((sheet_name, columns, category_papers))
+        write_report(output_file, sheets, fmt=output_format)
+
         # 检查是否需要下载论文
         if settings.get('download_papers', False):
             import shutil
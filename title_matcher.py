@@ -0,0 +1,68 @@
+import re
+import unicodedata
+
+from rapidfuzz import fuzz, process
+
+# 标题相似度阈值 (0-100)，与原先 SequenceMatcher 的 0.8 对应
+TITLE_SCORE_CUTOFF = 80
+
+_LATEX_MATH_RE = re.compile(r'\$([^$]*)\$')
+_LATEX_COMMAND_WITH_ARG_RE = re.compile(r'\\[a-zA-Z]+\*?\s*\{([^{}]*)\}')
+_LATEX_COMMAND_RE = re.compile(r'\\[a-zA-Z]+\*?|\\.')
+_NON_WORD_RE = re.compile(r'[^\w]+')
+
+
+def normalize_title(title):
+    """
+    把标题归一化为便于比较的形式：
+    去掉 LaTeX 命令和数学环境定界符 (保留其中的文字)、去掉重音符号、转为小写、把标点统一为空格。
+    """
+    if not title:
+        return ''
+    text = _LATEX_MATH_RE.sub(r' \1 ', title)
+    # 嵌套的命令 (例如 \textbf{\emph{x}}) 需要由内向外多次展开
+    previous = None
+    while previous != text:
+        previous = text
+        text = _LATEX_COMMAND_WITH_ARG_RE.sub(r'\1', text)
+    text = _LATEX_COMMAND_RE.sub(' ', text)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD_RE.sub(' ', text.lower()).replace('_', ' ').strip()
+
+
+class TitleMatcher:
+    """
+    一组候选标题的匹配器。候选标题在构建时只归一化一次，
+    之后每次查询通过 rapidfuzz 的 process.extractOne 在全部候选中找出得分最高的一个。
+    """
+
+    def __init__(self, titles=(), score_cutoff=TITLE_SCORE_CUTOFF):
+        self.score_cutoff = score_cutoff
+        self._choices = [normalize_title(title) for title in titles]
+
+    def __len__(self):
+        return len(self._choices)
+
+    def add(self, title):
+        """追加一个候选标题，返回其下标。"""
+        self._choices.append(normalize_title(title))
+        return len(self._choices) - 1
+
+    def match(self, title, score_cutoff=None, indices=None):
+        """
+        返回 (候选下标, 得分)；没有候选达到阈值时返回 None。
+        indices 可以把匹配范围限制在部分候选中 (例如先按作者过滤)。
+        """
+        query = normalize_title(title)
+        choices = self._choices if indices is None else {i: self._choices[i] for i in indices}
+        if not query or not choices:
+            return None
+        result = process.extractOne(
+            query, choices, scorer=fuzz.ratio,
+            score_cutoff=self.score_cutoff if score_cutoff is None else score_cutoff,
+        )
+        if result is None:
+            return None
+        _, score, index = result
+        return index, score
@@ -0,0 +1,94 @@
+import re
+import threading
+from functools import lru_cache
+
+from keyword_matcher import build_trie_pattern
+
+# 原始 venue 字符串 -> 匹配结果 的记忆化缓存大小
+VENUE_MEMO_SIZE = 65536
+
+
+def iter_venue_definitions(venue_definitions):
+    """
+    按匹配优先级依次产出 (会议名称, 会议定义)：
+    先是 'venues' 下的常规会议，然后是顶层的特殊条目 (例如 arXiv)。
+    """
+    if 'venues' in venue_definitions and isinstance(venue_definitions['venues'], dict):
+        yield from venue_definitions['venues'].items()
+
+    for key, value in venue_definitions.items():
+        if key != 'venues' and isinstance(value, dict) and 'venue' in value:
+            yield key, value
+
+
+class VenueIndex:
+    """
+    由会议定义预先构建的 venue 索引，用于替代对所有匹配模式的逐一子串扫描。
+
+    查找顺序：
+    1. 记忆化缓存：同一个原始 venue 字符串只解析一次；
+    2. 精确匹配哈希表：venue 字符串恰好等于某个匹配模式时直接命中；
+    3. 前缀树正则：一次扫描找出 venue 字符串中出现的全部模式，取定义顺序中最靠前的一个。
+
+    结果与按定义顺序逐一检查 `pattern.lower() in venue_lower` 的首个命中完全一致。
+    """
+
+    def __init__(self, venue_definitions):
+        # 按首个命中的优先级编号: rank -> (会议名称, 类别)
+        self._results = []
+        # 小写模式 -> 该模式在定义中首次出现的 rank
+        self._pattern_ranks = {}
+        for conf_name, conf_details in iter_venue_definitions(venue_definitions):
+            result = (conf_name, conf_details.get('category', 'Others'))
+            for pattern in conf_details.get('venue', []):
+                self._pattern_ranks.setdefault(pattern.lower(), len(self._results))
+                self._results.append(result)
+
+        # 空模式会匹配任何字符串
+        self._empty_rank = self._pattern_ranks.pop('', None)
+        patterns = list(self._pattern_ranks)
+        self._pattern = re.compile('(?=(' + build_trie_pattern(patterns) + '))') if patterns else None
+        # 同一位置上所有作为最长命中模式前缀的模式也同样命中，取其中优先级最高的 rank
+        self._best_rank_at = {
+            pattern: min(rank for other, rank in self._pattern_ranks.items() if pattern.startswith(other))
+            for pattern in patterns
+        }
+        # 精确匹配表：venue 字符串等于某个模式时，其结果仍需遵守首个命中的顺序
+        self._exact = {pattern: self._scan(pattern) for pattern in patterns}
+
+        self.lookup = lru_cache(maxsize=VENUE_MEMO_SIZE)(self._resolve)
+
+    def _scan(self, venue_lower):
+        best = self._empty_rank
+        if self._pattern is not None:
+            for match in self._pattern.finditer(venue_lower):
+                rank = self._best_rank_at[match.group(1)]
+                if best is None or rank < best:
+                    best = rank
+        return (None, None) if best is None else self._results[best]
+
+    def _resolve(self, venue_str):
+        venue_lower = venue_str.lower().replace(",", "")
+        exact = self._exact.get(venue_lower)
+        if exact is not None:
+            return exact
+        return self._scan(venue_lower)
+
+
+_index_cache = {}
+_index_cache_lock = threading.Lock()
+
+
+def get_venue_index(venue_definitions):
+    """
+    返回与给定会议定义对应的 VenueIndex，同一个定义对象只构建一次。
+    注意：索引构建后再修改该定义对象不会反映到索引中。
+    """
+    key = id(venue_definitions)
+    with _index_cache_lock:
+        cached = _index_cache.get(key)
+        # 同时保存定义对象本身，避免对象被回收后 id 被复用
+        if cached is None or cached[0] is not venue_definitions:
+            cached = (venue_definitions, VenueIndex(venue_definitions))
+            _index_cache[key] = cached
+        return cached[1]